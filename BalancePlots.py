@@ -0,0 +1,182 @@
+# Part A extension: Balance-decline charts for single loans and whole portfolios
+# Client wants the Loan_Balance_Decline.png chart for every loan in a book, plus aggregate portfolio charts, in seconds.
+# Charts are drawn headless with Matplotlib's object-oriented API on the Agg canvas (no pyplot state, no GUI backend), so they
+# can be rendered in parallel worker processes.
+# Series are downsampled before drawing, because a chart cannot show more points than it has pixel columns:
+#   - minmax_downsample(): keeps the minimum and maximum of each pixel column (exact at pixel resolution), many series at once
+#   - lttb(): Largest-Triangle-Three-Buckets, keeps the points that preserve the visual shape of one series
+# Portfolio charts draw every loan in a single LineCollection instead of one plt.plot call per loan.
+# Public functions:
+#   - plot_balance_decline(schedules, path): the six-schedule chart from LoanAmortization.py
+#   - plot_portfolio_balances(tensor, path, option): every loan's balance for one payment option and the portfolio total
+#   - render_loan_charts(tensor, output_dir, workers): one balance-decline chart per loan, rendered in a process pool
+# Assumes values have been validated.
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter
+
+from PortfolioAmortization import PAYMENT_OPTIONS
+
+COMMA_FORMATTER = FuncFormatter(lambda x, _: f"{x:,.0f}")
+
+
+def minmax_downsample(x, y, n_bins):
+    """Reduce series to the min and max of each of n_bins equal-width x bins. y is one series or a 2-D (series x points)
+    array sharing x; NaN marks missing points. Returns (x_out, y_out) with 2 points per bin (bin centre, max then min),
+    or the input unchanged when it already has no more than 2 * n_bins points."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if x.size <= 2 * n_bins:
+        return x, y
+
+    edges = np.linspace(x[0], x[-1], n_bins + 1)
+    starts = np.searchsorted(x, edges[:-1], side="left")
+    starts = np.unique(np.minimum(starts, x.size - 1))
+    centres = np.add.reduceat(x, starts) / np.diff(np.append(starts, x.size))
+
+    with np.errstate(invalid="ignore"):
+        high = np.fmax.reduceat(y, starts, axis=-1)
+        low = np.fmin.reduceat(y, starts, axis=-1)
+    x_out = np.repeat(centres, 2)
+    y_out = np.stack([high, low], axis=-1).reshape(*y.shape[:-1], -1)
+    return x_out, y_out
+
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets downsampling of one series to n_out points (first and last points always kept).
+    Returns (x_out, y_out), or the input unchanged when it has no more than n_out points."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = x.size
+    if n <= n_out or n_out < 3:
+        return x, y
+
+    # Bucket boundaries for the n - 2 interior points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    keep = np.empty(n_out, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Average of the next bucket (or the last point) is the third triangle vertex
+        next_lo, next_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return x[keep], y[keep]
+
+
+def _balance_axes(ax, title, xlabel="Payment Period (within term)"):
+    """Title, labels, grid and comma-formatted balance axis used by every chart."""
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel("Ending Balance ($)")
+    ax.grid(True, linestyle="--", linewidth=0.5, alpha=0.6)
+    ax.yaxis.set_major_formatter(COMMA_FORMATTER)
+
+
+def _save(fig, path, dpi):
+    """Render the figure on an Agg canvas and write it to path."""
+    FigureCanvasAgg(fig)
+    fig.tight_layout()
+    fig.savefig(path, dpi=dpi)
+    return path
+
+
+def plot_balance_decline(schedules, path="Loan_Balance_Decline.png", max_points=2000, dpi=200, figsize=(10, 7)):
+    """Plot the Ending Balance of {option name: schedule DataFrame} on one chart (the LoanAmortization.py chart),
+    each series reduced with LTTB to at most max_points points. Returns the path written."""
+    fig = Figure(figsize=figsize)
+    ax = fig.add_subplot()
+    for name, df in schedules.items():
+        ax.plot(*lttb(df["Period"].to_numpy(), df["Ending Balance"].to_numpy(), max_points), label=name)
+    _balance_axes(ax, "Loan Balance Decline by Payment Schedule")
+    ax.legend()
+    return _save(fig, path, dpi)
+
+
+def _loan_segments(end_balance, n_periods, n_bins):
+    """(loans x periods) balances with per-loan lengths -> list of (points x 2) arrays, min/max downsampled to n_bins columns."""
+    periods = np.arange(1, end_balance.shape[1] + 1)
+    balances = np.where(periods <= n_periods[:, None], end_balance, np.nan)
+    x, y = minmax_downsample(periods, balances, n_bins)
+    segments = []
+    for row in y:
+        valid = ~np.isnan(row)
+        segments.append(np.column_stack([x[valid], row[valid]]))
+    return segments
+
+
+def plot_portfolio_balances(tensor, path, option="Monthly", loans=None, dpi=100, figsize=(12, 9)):
+    """Chart one payment option for a ScheduleTensor: every loan's Ending Balance in one LineCollection (top) and the
+    portfolio's total balance (bottom). loans selects a subset (labels of tensor.index). Series are min/max downsampled to
+    the chart's pixel width. Returns the path written."""
+    j = tensor.options.index(option)
+    rows = np.arange(len(tensor.index)) if loans is None else tensor.index.get_indexer(loans)
+    end_balance = tensor.end_balance[rows, j]
+    n_periods = tensor.n_periods[rows, j]
+    n_bins = int(figsize[0] * dpi)
+
+    fig = Figure(figsize=figsize)
+    ax_loans, ax_total = fig.subplots(2, 1, sharex=True)
+
+    lines = LineCollection(_loan_segments(end_balance, n_periods, n_bins), linewidths=0.5, alpha=0.3)
+    ax_loans.add_collection(lines)
+    ax_loans.autoscale_view()
+    _balance_axes(ax_loans, f"{option} Balance Decline: {len(rows):,} loans", xlabel="")
+
+    periods = np.arange(1, end_balance.shape[1] + 1)
+    total = np.where(periods <= n_periods[:, None], end_balance, 0).sum(axis=0)
+    ax_total.plot(*minmax_downsample(periods, total, n_bins), color="black")
+    _balance_axes(ax_total, "Portfolio Total Balance")
+    return _save(fig, path, dpi)
+
+
+def _render_loan_chunk(task):
+    """Worker: draw the six-option balance chart for each loan of one chunk and return the paths.
+    One figure is built per chunk with fixed margins (no tight_layout per chart); each loan only replaces the line data,
+    rescales the axes and saves, so a chart costs a single draw."""
+    loan_ids, end_balance, n_periods, output_dir, dpi = task
+    n_bins = 10 * dpi
+    fig = Figure(figsize=(10, 7))
+    FigureCanvasAgg(fig)
+    fig.subplots_adjust(left=0.12, right=0.97, top=0.94, bottom=0.08)
+    ax = fig.add_subplot()
+    lines = [ax.plot([], [], label=name)[0] for name in PAYMENT_OPTIONS]
+    _balance_axes(ax, "")
+    ax.legend()
+
+    paths = []
+    for loan, balances, lengths in zip(loan_ids, end_balance, n_periods):
+        for line, balance, n in zip(lines, balances, lengths):
+            line.set_data(*minmax_downsample(np.arange(1, n + 1), balance[:n], n_bins))
+        ax.relim()
+        ax.autoscale_view()
+        ax.set_title(f"Loan {loan}: Balance Decline by Payment Schedule")
+        path = os.path.join(output_dir, f"loan_{loan}.png")
+        fig.savefig(path, dpi=dpi)
+        paths.append(path)
+    return paths
+
+
+def render_loan_charts(tensor, output_dir, workers=None, chunk_size=100, dpi=100):
+    """Write loan_<id>.png (all six payment options) for every loan of a ScheduleTensor to output_dir, rendering chunks of
+    chunk_size loans in a pool of `workers` processes (default: all cores). Series are min/max downsampled to the
+    chart's pixel width. Returns the paths in loan order."""
+    os.makedirs(output_dir, exist_ok=True)
+    loan_ids = tensor.index.to_numpy()
+    tasks = [
+        (loan_ids[lo:lo + chunk_size], tensor.end_balance[lo:lo + chunk_size], tensor.n_periods[lo:lo + chunk_size],
+         output_dir, dpi)
+        for lo in range(0, len(loan_ids), chunk_size)
+    ]
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        return [path for paths in pool.map(_render_loan_chunk, tasks) for path in paths]
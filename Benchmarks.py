@@ -0,0 +1,612 @@
+# Benchmarks for the mortgage and CPI libraries.
+# Client wants to see how fast the portfolio-scale code paths are compared with the original one-object-per-loan approach.
+# Each benchmark builds a synthetic portfolio, times both approaches and prints loans per second.
+# Run with: python Benchmarks.py [number of loans]
+# Regression suite: python Benchmarks.py suite [--loans N] [--months N] [--items N] [--output results.json]
+#                                              [--baseline baseline.json] [--threshold 0.25] [--min-delta 0.002]
+#   times each stage (payments, schedules, scenarios, CPI load, each CPI question, Excel export) separately, saves the results as JSON
+#   and exits with status 1 when a stage is slower than the baseline by more than the threshold (0.25 = 25%)
+#   and by more than min-delta seconds; exits with status 2, without timing anything, when --loans, --months, --items or
+#   --repeat differ from the settings recorded in the baseline.
+# Assumes values have been validated.
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from BalancePlots import plot_portfolio_balances, render_loan_charts
+from ConsumerPriceIndex import CPIAnalysis, export_report
+from LoanAmortization import MortgagePayment, export_schedules, quote_cache
+from PortfolioAmortization import batch_payments, build_schedule_tensor
+from ScenarioSimulation import annual_lump_sums, renewal_rate_paths, simulate_scenarios
+
+
+def make_loans(n_loans, seed=0):
+    """Build a synthetic portfolio DataFrame with varied principals, rates, amortizations and terms."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "principal": rng.uniform(50_000, 1_500_000, n_loans).round(2),
+        "rate_percent": rng.uniform(1.0, 9.0, n_loans).round(2),
+        "amort_years": rng.choice([15, 20, 25, 30], n_loans),
+        "term_years": rng.choice([1, 2, 3, 5, 10], n_loans),
+    })
+
+
+JURISDICTIONS = ["Canada", "AB", "BC", "MB", "NB", "NL", "NS", "ON", "PEI", "QC", "SK"]
+CPI_ITEMS = ["All-items", "Food", "Shelter", "All-items excluding food and energy", "Services"]
+
+
+def make_cpi_files(folder, n_months=12, n_items=15, seed=0, last_month="2024-12"):
+    """Write StatCan-shaped CPI files (<Jurisdiction>.CPI.1810000401.csv, one Item row per CPI item and one column per month)
+    for the 11 jurisdictions, plus MinimumWages.csv. Returns (cpi file paths, wages file path).
+    January columns use the "24-Jan" spelling the real downloads have; other months are "Feb-24"."""
+    rng = np.random.default_rng(seed)
+    months = pd.period_range(end=last_month, periods=n_months, freq="M")
+    labels = [m.strftime("%y-%b") if m.month == 1 else m.strftime("%b-%y") for m in months]
+    items = CPI_ITEMS + [f"Item {i}" for i in range(len(CPI_ITEMS), n_items)]
+
+    os.makedirs(folder, exist_ok=True)
+    cpi_files = []
+    for jurisdiction in JURISDICTIONS:
+        growth = 1 + rng.normal(0.002, 0.004, size=(len(items), n_months))
+        cpi = (rng.uniform(100, 180, size=(len(items), 1)) * np.cumprod(growth, axis=1)).round(1)
+        file_name = os.path.join(folder, f"{jurisdiction}.CPI.1810000401.csv")
+        pd.DataFrame(cpi, columns=labels).assign(Item=items)[["Item", *labels]].to_csv(file_name, index=False)
+        cpi_files.append(file_name)
+
+    wages_file = os.path.join(folder, "MinimumWages.csv")
+    pd.DataFrame({
+        "Province": JURISDICTIONS[1:],
+        "Minimum Wage": rng.uniform(15, 17.5, len(JURISDICTIONS) - 1).round(2),
+    }).to_csv(wages_file, index=False)
+    return cpi_files, wages_file
+
+
+def _timed(func, *args):
+    """Return (result, seconds) for a single call."""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def _baseline_payments(principal, rate_percent, amort_years):
+    """The original MortgagePayment.payments() math, unchanged: EAR -> periodic rate -> annuity factor per frequency."""
+    rate = rate_percent / 100.0
+    ear = (1 + rate / 2.0) ** 2 - 1
+    base_payments = []
+    for f in (12, 24, 26, 52):
+        r = (1 + ear) ** (1 / f) - 1
+        n = int(int(amort_years) * f)
+        factor = n if r == 0 else (1 - (1 + r) ** (-n)) / r
+        base_payments.append(round(principal / factor, 2))
+    monthly = base_payments[0]
+    base_payments += [round(monthly / 2, 2), round(monthly / 4, 2)]
+    return tuple(base_payments)
+
+
+def _baseline_per_object_payments(loans):
+    """Original approach with the original math: one quote per loan, looping over the frequencies."""
+    return [
+        _baseline_payments(principal, rate, amort)
+        for principal, rate, amort, _ in loans.itertuples(index=False)
+    ]
+
+
+def _per_object_payments(loans):
+    """One MortgagePayment per loan, looping over the frequencies."""
+    return [
+        MortgagePayment(rate, amort, term).payments(principal)
+        for principal, rate, amort, term in loans.itertuples(index=False)
+    ]
+
+
+def bench_payments(n_loans):
+    """Compare batch_payments() and the current MortgagePayment loop with the original per-object math and print loans
+    per second."""
+    loans = make_loans(n_loans)
+    _, baseline_secs = _timed(_baseline_per_object_payments, loans)
+    _, loop_secs = _timed(_per_object_payments, loans)
+    _, batch_secs = _timed(batch_payments, loans)
+
+    print(f"\nPAYMENTS ({n_loans:,} loans)")
+    print(f"{'Original loop':>18}: {baseline_secs:8.3f}s  {n_loans / baseline_secs:>14,.0f} loans/s")
+    print(f"{'MortgagePayment':>18}: {loop_secs:8.3f}s  {n_loans / loop_secs:>14,.0f} loans/s")
+    print(f"{'batch_payments':>18}: {batch_secs:8.3f}s  {n_loans / batch_secs:>14,.0f} loans/s")
+    print(f"{'Speed-up':>18}: {baseline_secs / batch_secs:8.1f}x (batch vs original loop)")
+
+
+def _cell_by_cell_export(schedules, path):
+    """Original Payment_Schedules.xlsx export: normal openpyxl workbook, then width and format passes over every cell."""
+    from openpyxl.styles import Font, Alignment, PatternFill
+    from openpyxl.utils import get_column_letter
+
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        for name, df in schedules.items():
+            sheet_name = f"{name} Payments"
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+            ws = writer.sheets[sheet_name]
+            header_fill = PatternFill(start_color="D9D9D9", end_color="D9D9D9", fill_type="solid")
+            for col_idx, col_name in enumerate(df.columns, start=1):
+                col_letter = get_column_letter(col_idx)
+                header_cell = ws[f"{col_letter}1"]
+                header_cell.font = Font(bold=True)
+                header_cell.alignment = Alignment(horizontal="center")
+                header_cell.fill = header_fill
+                max_len = max((len(str(cell.value)) for cell in ws[col_letter]), default=len(col_name))
+                ws.column_dimensions[col_letter].width = max_len + 2
+                if col_name != "Period":
+                    for cell in ws[col_letter][1:]:
+                        cell.number_format = u'"$"#,##0.00'
+
+
+def bench_export(n_loans=1000, sample=50):
+    """Export every loan's six schedules to its own workbook with the streaming writer, and time the original
+    cell-by-cell export on the first `sample` loans. Also times one bulk CSV of the whole portfolio in long format."""
+    loans = make_loans(n_loans)
+    tensor = build_schedule_tensor(loans)
+    schedules = [
+        {option: tensor.schedule(i, option) for option in tensor.options}
+        for i in range(n_loans)
+    ]
+
+    with tempfile.TemporaryDirectory() as folder:
+        def streaming():
+            for i, loan_schedules in enumerate(schedules):
+                export_schedules(loan_schedules, os.path.join(folder, f"loan_{i}.xlsx"))
+
+        def cell_by_cell():
+            for i, loan_schedules in enumerate(schedules[:sample]):
+                _cell_by_cell_export(loan_schedules, os.path.join(folder, f"old_{i}.xlsx"))
+
+        def bulk_csv():
+            export_schedules({"Portfolio": tensor.to_long()}, os.path.join(folder, "csv"), backend="csv")
+
+        _, new_secs = _timed(streaming)
+        _, old_secs = _timed(cell_by_cell)
+        _, csv_secs = _timed(bulk_csv)
+
+    sample = min(sample, n_loans)
+    print(f"\nSCHEDULE EXPORT ({n_loans:,} loans x 6 schedules)")
+    print(f"{'Cell-by-cell xlsx':>18}: {old_secs:8.3f}s  {sample / old_secs:>14,.1f} loans/s  (first {sample} loans)")
+    print(f"{'Streaming xlsx':>18}: {new_secs:8.3f}s  {n_loans / new_secs:>14,.1f} loans/s")
+    print(f"{'Bulk long CSV':>18}: {csv_secs:8.3f}s  {n_loans / csv_secs:>14,.1f} loans/s")
+    print(f"{'Speed-up (xlsx)':>18}: {(n_loans / new_secs) / (sample / old_secs):8.1f}x")
+
+
+def _pyplot_loan_chart(tensor, i, path):
+    """Original Loan_Balance_Decline.png approach: pyplot, every period of all six schedules, tight_layout, 200 dpi."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(10, 7))
+    for option in tensor.options:
+        df = tensor.schedule(tensor.index[i], option)
+        plt.plot(df["Period"], df["Ending Balance"], label=option)
+    plt.legend()
+    plt.grid(True, linestyle="--", linewidth=0.5, alpha=0.6)
+    plt.tight_layout()
+    plt.savefig(path, dpi=200)
+    plt.close()
+
+
+def bench_plots(n_loans=200, sample=10, workers=None):
+    """Time per-loan balance charts: the original pyplot chart on the first `sample` loans against render_loan_charts()
+    for the whole book, plus one portfolio chart (all loans' weekly balances in a LineCollection). Prints charts per second
+    and total PNG size."""
+    loans = make_loans(n_loans)
+    loans["term_years"] = 25
+    tensor = build_schedule_tensor(loans)
+
+    with tempfile.TemporaryDirectory() as folder:
+        old_dir, new_dir = os.path.join(folder, "old"), os.path.join(folder, "new")
+        os.makedirs(old_dir)
+        _, old_secs = _timed(lambda: [_pyplot_loan_chart(tensor, i, os.path.join(old_dir, f"loan_{i}.png")) for i in range(sample)])
+        paths, new_secs = _timed(render_loan_charts, tensor, new_dir, workers)
+        _, book_secs = _timed(plot_portfolio_balances, tensor, os.path.join(folder, "book.png"), "Weekly")
+
+        old_kb = sum(os.path.getsize(os.path.join(old_dir, f)) for f in os.listdir(old_dir)) / sample / 1e3
+        new_kb = sum(os.path.getsize(p) for p in paths) / n_loans / 1e3
+
+    print(f"\nBALANCE CHARTS ({n_loans:,} loans x 6 schedules, 25-year terms)")
+    print(f"{'pyplot per loan':>18}: {old_secs:8.3f}s  {sample / old_secs:>10,.1f} charts/s  {old_kb:8.1f} KB/chart  (first {sample} loans)")
+    print(f"{'render_loan_charts':>18}: {new_secs:8.3f}s  {n_loans / new_secs:>10,.1f} charts/s  {new_kb:8.1f} KB/chart")
+    print(f"{'Portfolio chart':>18}: {book_secs:8.3f}s  (all loans, Weekly)")
+
+
+def _concat_loader(csv_files):
+    """Original ConsumerPriceIndex.py load step: grow df with pd.concat per file, per-row month fix-up, two to_datetime calls.
+    (The per-row fix-up is generalized from "24-" to any "YY-Mon" label so it can read a full history.)"""
+    df = pd.DataFrame()
+    for file_name in csv_files:
+        temp = pd.melt(pd.read_csv(file_name), id_vars="Item", var_name="Month", value_name="CPI")
+        temp["Jurisdiction"] = file_name.replace("\\", "/").split("/")[-1].split(".")[0]
+        temp["Month"] = temp["Month"].apply(lambda x: x[3:] + "-" + x[:2] if x[:2].isdigit() else x)
+        df = pd.concat([df, temp], ignore_index=True)
+    df = df[["Item", "Month", "Jurisdiction", "CPI"]]
+    df["Date"] = pd.to_datetime(df["Month"], format="%b-%y")
+    df["Date"] = pd.to_datetime(df["Month"], format="%b-%y")
+    return df
+
+
+def bench_cpi_load(n_months=672, n_items=200):
+    """Compare CPIAnalysis.load_cpi_data() with the original concat loop on a full-history sized dataset
+    (default: Jan 1969 - Dec 2024, the longest span two-digit-year month labels parse correctly, for 200 items
+    in each of the 11 jurisdictions). Prints time and frame memory."""
+    with tempfile.TemporaryDirectory() as folder:
+        cpi_files, wages_file = make_cpi_files(folder, n_months=n_months, n_items=n_items)
+        old_df, old_secs = _timed(_concat_loader, cpi_files)
+        new_df, new_secs = _timed(CPIAnalysis(cpi_files, wages_file).load_cpi_data)
+
+    old_mb = old_df.memory_usage(deep=True).sum() / 1e6
+    new_mb = new_df.memory_usage(deep=True).sum() / 1e6
+    print(f"\nCPI LOAD ({len(new_df):,} rows: {n_items} items x {n_months} months x 11 jurisdictions)")
+    print(f"{'pd.concat loop':>18}: {old_secs:8.3f}s  {old_mb:10.1f} MB")
+    print(f"{'load_cpi_data':>18}: {new_secs:8.3f}s  {new_mb:10.1f} MB")
+    print(f"{'Improvement':>18}: {old_secs / new_secs:8.1f}x  {old_mb / new_mb:10.1f}x")
+
+
+def bench_cpi_cache(n_months=672, n_items=200):
+    """Time load_cpi_data() with an on-disk cache: cold (reads every CSV and writes the cache), warm (no file changed)
+    and after one jurisdiction's file changed (only that file is re-read)."""
+    with tempfile.TemporaryDirectory() as folder:
+        cpi_files, wages_file = make_cpi_files(folder, n_months=n_months, n_items=n_items)
+        cache_dir = os.path.join(folder, "cache")
+        _, cold_secs = _timed(CPIAnalysis(cpi_files, wages_file, cache_dir=cache_dir).load_cpi_data)
+        _, warm_secs = _timed(CPIAnalysis(cpi_files, wages_file, cache_dir=cache_dir).load_cpi_data)
+
+        changed = pd.read_csv(cpi_files[0])
+        changed.iloc[0, -1] += 0.1
+        changed.to_csv(cpi_files[0], index=False)
+        _, one_secs = _timed(CPIAnalysis(cpi_files, wages_file, cache_dir=cache_dir).load_cpi_data)
+
+    print(f"\nCPI CACHE ({n_items} items x {n_months} months x 11 jurisdictions)")
+    print(f"{'Cold (no cache)':>18}: {cold_secs:8.3f}s")
+    print(f"{'Warm':>18}: {warm_secs:8.3f}s  {cold_secs / warm_secs:8.1f}x")
+    print(f"{'One file changed':>18}: {one_secs:8.3f}s  {cold_secs / one_secs:8.1f}x")
+
+
+def bench_cpi_queries(n_queries=1000, n_months=672, n_items=200):
+    """Time point lookups (one item, jurisdiction and month) by boolean-masking the long frame against the CPI cube."""
+    with tempfile.TemporaryDirectory() as folder:
+        cpi_files, wages_file = make_cpi_files(folder, n_months=n_months, n_items=n_items)
+        analysis = CPIAnalysis(cpi_files, wages_file)
+        df = analysis.load_cpi_data()
+
+    rng = np.random.default_rng(0)
+    queries = list(zip(
+        rng.choice(analysis.cube.items, n_queries),
+        rng.choice(analysis.cube.jurisdictions, n_queries),
+        rng.choice(analysis.cube.months, n_queries),
+    ))
+
+    def masked():
+        return [
+            df.loc[(df["Item"] == item) & (df["Jurisdiction"] == jurisdiction) & (df["Month"] == month), "CPI"].iloc[0]
+            for item, jurisdiction, month in queries
+        ]
+
+    def cube():
+        return [analysis.cube.get(item, jurisdiction, month) for item, jurisdiction, month in queries]
+
+    _, mask_secs = _timed(masked)
+    _, cube_secs = _timed(cube)
+    print(f"\nCPI LOOKUPS ({n_queries:,} queries on {len(df):,} rows)")
+    print(f"{'Boolean masks':>18}: {mask_secs:8.3f}s  {n_queries / mask_secs:>14,.0f} queries/s")
+    print(f"{'CPICube.get':>18}: {cube_secs:8.3f}s  {n_queries / cube_secs:>14,.0f} queries/s")
+    print(f"{'Speed-up':>18}: {mask_secs / cube_secs:8.1f}x")
+
+
+def _cpi_report_tables(analysis):
+    """Question tables like the ConsumerPriceIndex.py report, with Q6 covering every month of the loaded history."""
+    df = analysis.df
+    items = ["All-items excluding food and energy", "Food", "Shelter"]
+    avg_change = analysis.avg_monthly_changes(items)
+    last_month = analysis.cube.months[-1]
+    salaries = analysis.cube.at_month("All-items", last_month).rename_axis("Jurisdiction").reset_index()
+    salaries["Equivalent_Salary"] = analysis.equivalent_salary(100000, "ON", last_month).round(2)
+    return {
+        "Q2_First12Rows": df[["Item", "Month", "Jurisdiction", "CPI"]].head(12),
+        "Q3_AvgMoMChange": avg_change.pivot(index="Jurisdiction", columns="Item", values="MoM_pct_change").reset_index(),
+        "Q4_TopProvince": analysis.province_with_highest_change(items),
+        "Q5_EquivalentSalary": salaries,
+        "Q6_NominalVsRealDiff": analysis.min_wage_summary().round(2),
+        "Q7_ServicesInflation": analysis.services_inflation().round(1),
+        "Q8_TopRegion": pd.DataFrame([analysis.region_with_highest_services_inflation()]),
+    }
+
+
+def _cell_by_cell_report(tables, path):
+    """Original CPI_Analysis_Results.xlsx export: normal openpyxl workbook, then width and format passes over every column."""
+    from openpyxl.styles import Font, Alignment, PatternFill
+    from openpyxl.utils import get_column_letter
+
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        for name, df in tables.items():
+            df.to_excel(writer, sheet_name=name, index=False)
+        for ws in writer.book.worksheets:
+            header_fill = PatternFill(start_color="D9D9D9", end_color="D9D9D9", fill_type="solid")
+            for col_idx, col in enumerate(ws.iter_cols(1, ws.max_column), start=1):
+                col_letter = get_column_letter(col_idx)
+                header_cell = ws[f"{col_letter}1"]
+                header_cell.font = Font(bold=True)
+                header_cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+                header_cell.fill = header_fill
+                max_len = max((len(str(cell.value)) if cell.value is not None else 0 for cell in col), default=0)
+                ws.column_dimensions[col_letter].width = max_len + 2
+            if ws.title == "Q6_NominalVsRealDiff":
+                for col in ["D", "E", "F"]:
+                    for cell in ws[col][1:]:
+                        cell.number_format = u'"$"#,##0.00'
+            if ws.title in ("Q7_ServicesInflation", "Q8_TopRegion"):
+                for cell in ws[1]:
+                    if str(cell.value) == "Annual_pct_change":
+                        for c in ws[cell.column_letter][1:]:
+                            c.number_format = '0.0"%"'
+                        break
+
+
+def bench_cpi_report(n_months=672, n_items=200):
+    """Time the CPI report on a full-history dataset (Q6 holds every province x month): the original openpyxl export with
+    per-cell passes against export_report() with each backend, plus the whole combined frame to CSV and SQLite."""
+    with tempfile.TemporaryDirectory() as folder:
+        cpi_files, wages_file = make_cpi_files(folder, n_months=n_months, n_items=n_items)
+        analysis = CPIAnalysis(cpi_files, wages_file)
+        analysis.load_cpi_data()
+        tables = _cpi_report_tables(analysis)
+        rows = sum(len(df) for df in tables.values())
+
+        timings = {"Cell-by-cell xlsx": _timed(_cell_by_cell_report, tables, os.path.join(folder, "old.xlsx"))[1]}
+        for backend, target in [("excel", "report.xlsx"), ("csv", "report_csv"), ("sqlite", "report.sqlite")]:
+            timings[f"export_report {backend}"] = _timed(export_report, tables, os.path.join(folder, target), backend)[1]
+
+        combined = {"Combined": analysis.df}
+        csv_secs = _timed(export_report, combined, os.path.join(folder, "combined_csv"), "csv")[1]
+        sqlite_secs = _timed(export_report, combined, os.path.join(folder, "combined.sqlite"), "sqlite")[1]
+
+    print(f"\nCPI REPORT ({rows:,} report rows from {n_items} items x {n_months} months x 11 jurisdictions)")
+    for name, secs in timings.items():
+        print(f"{name:>22}: {secs:8.3f}s  {timings['Cell-by-cell xlsx'] / secs:8.1f}x")
+    print(f"COMBINED FRAME ({len(analysis.df):,} rows)")
+    print(f"{'csv':>22}: {csv_secs:8.3f}s")
+    print(f"{'sqlite':>22}: {sqlite_secs:8.3f}s")
+
+
+def bench_cpi_first_query(n_months=672, n_items=200):
+    """Time importing ConsumerPriceIndex in a fresh interpreter (no I/O and no openpyxl at import), the first query on a
+    new CPIAnalysis (reads the files, or the on-disk cache when warm) and a repeated, memoized query."""
+    code = ("import sys, time; t = time.perf_counter(); import ConsumerPriceIndex; "
+            "print(time.perf_counter() - t, 'openpyxl' in sys.modules)")
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(os.path.abspath(__file__))).stdout.split()
+    import_secs, openpyxl_loaded = float(out[0]), out[1]
+
+    with tempfile.TemporaryDirectory() as folder:
+        make_cpi_files(folder, n_months=n_months, n_items=n_items)
+        cache_dir = os.path.join(folder, "cache")
+        analysis = CPIAnalysis.from_folder(folder, cache_dir=cache_dir)
+        _, cold_secs = _timed(analysis.services_inflation)
+        _, memo_secs = _timed(analysis.services_inflation)
+        _, warm_secs = _timed(CPIAnalysis.from_folder(folder, cache_dir=cache_dir).services_inflation)
+
+    print(f"\nCPI IMPORT AND FIRST QUERY ({n_items} items x {n_months} months x 11 jurisdictions)")
+    print(f"{'Import':>22}: {import_secs:8.3f}s  (openpyxl imported: {openpyxl_loaded})")
+    print(f"{'First query (cold)':>22}: {cold_secs:8.3f}s")
+    print(f"{'First query (cached)':>22}: {warm_secs:8.3f}s")
+    print(f"{'Repeated query':>22}: {memo_secs:8.5f}s")
+
+
+def _per_path_scenarios(rates, prepay, principal, amort_years, term_years):
+    """One scenario at a time with MortgagePayment objects (payment reset at each renewal), as a script would loop."""
+    term_periods = term_years * 12
+    results = []
+    for path_rates, path_prepay in zip(rates, prepay):
+        balance, interest_total, payoff = float(principal), 0.0, 0
+        for t, (rate, extra) in enumerate(zip(path_rates, path_prepay)):
+            if t % term_periods == 0:
+                loan = MortgagePayment(rate, max(amort_years - t // 12, 1), term_years)
+                payment, r, _ = loan.payment_details(balance)["Monthly"]
+            interest = balance * r
+            balance = balance + interest - min(payment, balance + interest)
+            balance -= min(extra, balance)
+            interest_total += interest
+            if balance < 0.005:
+                payoff = t + 1
+                break
+        results.append((payoff, interest_total))
+    return results
+
+
+def bench_scenarios(n_paths=10_000, sample=200, principal=500_000, rate=5.5, amort_years=25, term_years=5):
+    """Time simulate_scenarios() on n_paths Monthly rate/prepayment scenarios against a per-path MortgagePayment loop
+    on `sample` of the same paths."""
+    rng = np.random.default_rng(0)
+    horizon = amort_years * 12
+    rates = renewal_rate_paths(rate, term_years)(rng, sample, horizon)
+    prepay = annual_lump_sums(0.3, 10_000)(rng, sample, horizon)
+
+    maxsize = quote_cache.maxsize
+    quote_cache.maxsize = 0
+    try:
+        _, loop_secs = _timed(_per_path_scenarios, rates, prepay, principal, amort_years, term_years)
+    finally:
+        quote_cache.maxsize = maxsize
+    summary, vector_secs = _timed(simulate_scenarios, principal, rate, amort_years, term_years, "Monthly", n_paths,
+                                  renewal_rate_paths(rate, term_years), annual_lump_sums(0.3, 10_000))
+
+    print(f"\nRATE AND PREPAYMENT SCENARIOS ({n_paths:,} paths x {horizon} periods)")
+    print(f"{'Per-path loop':>22}: {loop_secs:8.3f}s for {sample} paths  ({sample / loop_secs:,.0f} paths/s)")
+    print(f"{'Vectorized':>22}: {vector_secs:8.3f}s for {n_paths:,} paths  ({n_paths / vector_secs:,.0f} paths/s)")
+    print(summary.quantiles().to_string())
+
+
+def _best_of(func, repeat):
+    """Fastest of `repeat` timed calls, in seconds."""
+    return min(_timed(func)[1] for _ in range(repeat))
+
+
+def _fresh(analysis, query, *args):
+    """Return a callable that runs an analysis query without its memoized result."""
+    def run():
+        analysis._memo.clear()
+        return query(*args)
+    return run
+
+
+def run_suite(n_loans=10_000, n_months=120, n_items=50, n_schedules=100, repeat=3):
+    """Time every stage separately (best of `repeat`) on synthetic data and return {stage name: seconds}.
+    Loan stages use a portfolio of n_loans (build_all_schedules on the first n_schedules), with the float and the
+    integer-cents schedule engines, plus 10,000 rate/prepayment scenarios for one loan; CPI stages use n_items x n_months
+    files for the 11 jurisdictions. The quote cache is disabled so repeated runs measure the calculation itself."""
+    loans = make_loans(n_loans)
+    sample = loans.head(n_schedules)
+    stages = {}
+
+    maxsize = quote_cache.maxsize
+    quote_cache.maxsize = 0
+    try:
+        stages["payments_per_object"] = _best_of(lambda: _per_object_payments(sample), repeat)
+        stages["payments_batch"] = _best_of(lambda: batch_payments(loans), repeat)
+        stages["schedules_per_object"] = _best_of(lambda: [
+            MortgagePayment(rate, amort, term).build_all_schedules(principal)
+            for principal, rate, amort, term in sample.itertuples(index=False)
+        ], repeat)
+        stages["schedules_tensor"] = _best_of(lambda: build_schedule_tensor(loans), repeat)
+        stages["schedules_per_object_cents"] = _best_of(lambda: [
+            MortgagePayment(rate, amort, term).build_all_schedules(principal, rounding="half_even")
+            for principal, rate, amort, term in sample.itertuples(index=False)
+        ], repeat)
+        stages["schedules_tensor_cents"] = _best_of(lambda: build_schedule_tensor(loans, rounding="half_even"), repeat)
+        stages["scenarios_10k_paths"] = _best_of(lambda: simulate_scenarios(
+            500_000, 5.5, 25, 5, "Monthly", 10_000, renewal_rate_paths(5.5, 5), annual_lump_sums(0.3, 10_000)), repeat)
+    finally:
+        quote_cache.maxsize = maxsize
+
+    tensor = build_schedule_tensor(sample)
+    schedules = {option: tensor.schedule(0, option) for option in tensor.options}
+
+    with tempfile.TemporaryDirectory() as folder:
+        cpi_files, wages_file = make_cpi_files(folder, n_months=n_months, n_items=n_items)
+        analysis = CPIAnalysis(cpi_files, wages_file)
+        stages["cpi_load"] = _best_of(analysis.load_cpi_data, repeat)
+
+        items = ["All-items excluding food and energy", "Food", "Shelter"]
+        stages["cpi_q3_avg_monthly_changes"] = _best_of(_fresh(analysis, analysis.avg_monthly_changes, items), repeat)
+        stages["cpi_q4_highest_change"] = _best_of(_fresh(analysis, analysis.province_with_highest_change, items), repeat)
+        stages["cpi_q5_equivalent_salary"] = _best_of(lambda: analysis.equivalent_salary(100000, "ON", analysis.cube.months[-1]), repeat)
+        stages["cpi_q6_min_wage_summary"] = _best_of(_fresh(analysis, analysis.min_wage_summary), repeat)
+        stages["cpi_q7_services_inflation"] = _best_of(_fresh(analysis, analysis.services_inflation), repeat)
+        stages["cpi_q8_top_region"] = _best_of(_fresh(analysis, analysis.region_with_highest_services_inflation), repeat)
+
+        tables = _cpi_report_tables(analysis)
+        stages["excel_schedules"] = _best_of(lambda: export_schedules(schedules, os.path.join(folder, "schedules.xlsx")), repeat)
+        stages["excel_cpi_report"] = _best_of(lambda: export_report(tables, os.path.join(folder, "report.xlsx")), repeat)
+
+    return stages
+
+
+def save_results(stages, path, **config):
+    """Write the stage timings to path as JSON, with the run configuration and library versions."""
+    results = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "config": config,
+        "stages": stages,
+    }
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+    return results
+
+
+def config_mismatches(config, baseline_path):
+    """Return {setting: (baseline value, current value)} for run settings that differ from the baseline's config
+    (timings from different data sizes cannot be compared)."""
+    with open(baseline_path) as f:
+        baseline = json.load(f).get("config", {})
+    return {key: (baseline.get(key), config.get(key)) for key in sorted(set(baseline) | set(config))
+            if baseline.get(key) != config.get(key)}
+
+
+def compare_to_baseline(stages, baseline_path, threshold=0.25, min_delta=0.002):
+    """Compare stage timings with the baseline JSON and return a DataFrame (one row per stage present in both) with
+    Baseline, Current, Change (current / baseline - 1) and Regressed: Change > threshold and at least min_delta seconds
+    slower, so millisecond-scale stages are not flagged for timer noise."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)["stages"]
+
+    common = [name for name in stages if name in baseline]
+    comparison = pd.DataFrame({
+        "Baseline": [baseline[name] for name in common],
+        "Current": [stages[name] for name in common],
+    }, index=pd.Index(common, name="Stage"))
+    comparison["Change"] = comparison["Current"] / comparison["Baseline"] - 1
+    comparison["Regressed"] = (comparison["Change"] > threshold) & (comparison["Current"] - comparison["Baseline"] > min_delta)
+    return comparison
+
+
+def main_suite(argv):
+    """Command-line entry point for the regression suite; returns the process exit status."""
+    parser = argparse.ArgumentParser(prog="Benchmarks.py suite", description="Time each stage and compare with a baseline.")
+    parser.add_argument("--loans", type=int, default=10_000)
+    parser.add_argument("--months", type=int, default=120)
+    parser.add_argument("--items", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--min-delta", type=float, default=0.002)
+    args = parser.parse_args(argv)
+
+    config = {"n_loans": args.loans, "n_months": args.months, "n_items": args.items, "repeat": args.repeat}
+    if args.baseline is not None:
+        mismatches = config_mismatches(config, args.baseline)
+        if mismatches:
+            print(f"Run settings differ from {args.baseline}; re-run with the baseline's settings or record a new baseline:")
+            for key, (expected, actual) in mismatches.items():
+                print(f"{key:>28}: baseline {expected}, this run {actual}")
+            return 2
+    stages = run_suite(args.loans, args.months, args.items, repeat=args.repeat)
+    save_results(stages, args.output, **config)
+
+    print(f"\nBENCHMARK SUITE ({args.loans:,} loans; CPI {args.items} items x {args.months} months)")
+    for name, secs in stages.items():
+        print(f"{name:>28}: {secs:8.4f}s")
+    print(f"Results saved to: {args.output}")
+
+    if args.baseline is None:
+        return 0
+    comparison = compare_to_baseline(stages, args.baseline, args.threshold, args.min_delta)
+    print(f"\nCOMPARED WITH {args.baseline} (threshold {args.threshold:.0%})")
+    print(comparison.to_string(formatters={"Change": "{:+.1%}".format}))
+    regressed = list(comparison.index[comparison["Regressed"]])
+    if regressed:
+        print(f"\nREGRESSED: {', '.join(regressed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "suite":
+        sys.exit(main_suite(sys.argv[2:]))
+
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    bench_payments(n)
+    bench_export()
+    bench_cpi_load()
+    bench_cpi_cache()
+    bench_cpi_queries()
+    bench_cpi_report()
+    bench_cpi_first_query()
+    bench_plots()
+    bench_scenarios()
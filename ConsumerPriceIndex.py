@@ -11,270 +11,618 @@
 # Attributes of the CPIAnalysis class (Part B version) are:
 #   - cpi_files: a list or dictionary of file paths for the 11 CPI CSV files
 #   - wages_file: the file path for MinimumWages.csv
+#   - cube: CPICube built by load_cpi_data(), a dense item x jurisdiction x month array of CPI values with label indexes,
+#           used for point lookups (equivalent salary, real wages, services inflation) instead of filtering the long data frame
+#   - metrics: InflationMetrics built by load_cpi_data(), running MoM means, first/last CPI and trailing 12-month changes
+#              that append_month() updates for a new release without rescanning history
+#   - cache_dir: optional folder for the on-disk CPI cache (one .npz per jurisdiction holding items, months, CPI and MoM % change);
+#                a jurisdiction is only re-read when its file's size, modification time and contents hash say it changed
+# Importing the module does no I/O. Files are read on first use of df, cube or metrics (or an explicit load_cpi_data() call),
+# and each derived table is computed once per instance and argument set, then reused until the data changes.
+# Run with: python ConsumerPriceIndex.py [CSV folder]
 # Public methods:
+#   - from_folder(folder): build the file list for a StatCan download folder (11 CPI files plus MinimumWages.csv).
 #   - load_cpi_data(): read and combine all CPI files.
 #   - print_head(): display first 12 rows of combined data.
+#   - min_wages(): MinimumWages.csv as a DataFrame.
+#   - append_month(month, cpi): add a newly published month to the running metrics.
 #   - avg_monthly_changes(): calculate average monthly % change for selected CPI items.
 #   - province_with_highest_change(): find province with the highest average change.
-#   - equivalent_salary(): compute equivalent salaries across provinces using All-items CPI.
-#   - min_wage_summary(): find highest/lowest nominal and highest real (CPI-adjusted) wages.
+#   - equivalent_salary(salaries, base, months): equivalent salaries across provinces using All-items CPI, broadcast over
+#     arrays of salaries, base jurisdictions and months.
+#   - min_wage_summary(months): nominal vs real (CPI-adjusted) minimum wages for every province and month.
 #   - services_inflation(): calculate annual % change in Services CPI.
 #   - region_with_highest_services_inflation(): identify region with highest services inflation.
+# Public functions:
+#   - export_report(tables, path, backend): write the question tables to CPI_Analysis_Results.xlsx (or CSV/Parquet/SQLite)
+# load_cpi_data(), the query methods and export_report() are recorded by Instrumentation when it is enabled (off by default).
+# Results are returned unrounded; format_currency() turns amounts into "$1,234.56" text for display only.
 # Assumes values have been validated (file paths, column names, months, and items are correct and consistent with the Statistics Canada CPI data and MinimumWages.csv).
 
+import functools
+import hashlib
+import os
+import sys
+import tempfile
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import pandas as pd
 
-"""Edit to match the full path to your CSV folder which contains unzipped folders"""
-filepath = r"C:\Users\Owner\OneDrive - York University\Documents\FINE 3300\A2 Data\A2 Data"
-
-csv_files = [
-    filepath + "\\Canada.CPI.1810000401.csv",
-    filepath + "\\AB.CPI.1810000401.csv",
-    filepath + "\\BC.CPI.1810000401.csv",
-    filepath + "\\MB.CPI.1810000401.csv",
-    filepath + "\\NB.CPI.1810000401.csv",
-    filepath + "\\NL.CPI.1810000401.csv",
-    filepath + "\\NS.CPI.1810000401.csv",
-    filepath + "\\ON.CPI.1810000401.csv",
-    filepath + "\\PEI.CPI.1810000401.csv",
-    filepath + "\\QC.CPI.1810000401.csv",
-    filepath + "\\SK.CPI.1810000401.csv"
-]
-
-# Question 1
-df = pd.DataFrame()
-
-for file_name in csv_files:
-    temp = pd.melt(pd.read_csv(file_name), id_vars="Item", var_name="Month", value_name="CPI")
-
-    """Clean jurisdiction name from the filename (e.g., 'ON', 'BC', 'Canada')"""
-    basename = file_name.replace("\\", "/").split("/")[-1]
-    temp["Jurisdiction"] = basename.split(".")[0]
-
-    temp["Month"] = temp["Month"].apply(
-        lambda x: x.replace("24-", "") + "-24" if x.startswith("24-") else x
-    )
-
-    df = pd.concat([df, temp], ignore_index=True)
-
-# Question 2
-"""Client wants to display the first 12 rows of the combined CPI data frame"""
-pd.set_option('display.max_colwidth', None)  # show full text in columns
-
-df = df[["Item", "Month", "Jurisdiction", "CPI"]]
-print("QUESTION 2: FIRST 12 LINES OF THE COMBINED DATAFRAME:")
-print(df.head(12))
-
-# Convert Month to a proper datetime once
-df["Date"] = pd.to_datetime(df["Month"], format="%b-%y")
-
-# Convert Month to a proper datetime once
-df["Date"] = pd.to_datetime(df["Month"], format="%b-%y")
-
-# Question 3
-"""Client wants to calculate the average month-to-month % change for Food, Shelter, and All-items (excluding food & energy),and display them in a wide table by province and Canada."""
-df["CPI"] = pd.to_numeric(df["CPI"])
-df["MoM_pct_change"] = df.groupby(["Jurisdiction", "Item"])["CPI"].pct_change() * 100
-"""Select only items of interest"""
-items_of_interest = ["All-items excluding food and energy", "Food", "Shelter"]
-df_interest = df.loc[df["Item"].isin(items_of_interest)]
-"""Compute average monthly change by jurisdiction and item"""
-avg_change = (
-    df_interest
-    .groupby(["Jurisdiction", "Item"])["MoM_pct_change"]
-    .mean()
-    .reset_index()
-)
-"""Pivot to make items columns (wide format)"""
-avg_pivot = avg_change.pivot(index="Jurisdiction", columns="Item", values="MoM_pct_change")
-"""# Round to one decimal and format with '%'"""
-avg_pivot = avg_pivot.round(1).astype(str) + "%"
-"""Sort alphabetically by jurisdiction"""
-avg_pivot = avg_pivot.sort_index()
-print("\nQUESTION 3: AVERAGE MONTH-TO-MONTH CHANGE (DISPLAYED BY CATEGORY):")
-print(avg_pivot.reset_index())
-
-# Question 4
-"""Client wants to identify all provinces that have the highest average change in each category."""
-"""Work from the numeric summary created in Question 3 (avg_change) and exclude Canada from the comparison"""
-prov_only = avg_change.loc[avg_change["Jurisdiction"] != "Canada"].copy()
-
-"""Round once to avoid tiny floating-point differences"""
-prov_only["MoM_rounded"] = prov_only["MoM_pct_change"].round(1)
-
-"""For each Item, find the maximum rounded value"""
-max_by_item = prov_only.groupby("Item")["MoM_rounded"].transform("max")
-
-"""Keep all provinces whose rounded value equals the max for that Item (handles ties)"""
-top_prov = prov_only.loc[prov_only["MoM_rounded"] == max_by_item].copy()
-
-"""Sort for nicer display"""
-top_prov = top_prov.sort_values(["Item", "Jurisdiction"]).reset_index(drop=True)
-
-print("\nQUESTION 4: PROVINCE(S) WITH THE HIGHEST AVERAGE CHANGE FOR EACH ITEM:")
-for item, group in top_prov.groupby("Item"):
-    prov_list = ", ".join(group["Jurisdiction"])
-    change_val = group["MoM_rounded"].iloc[0]
-    print(f"{item}: {prov_list} - {change_val}%")
-
-
-# Question 5
-"""Client wants to compute equivalent salaries across provinces using Dec-24 All-items CPI and display both CPI and equivalent salary values."""
-all_items = df[df["Item"] == "All-items"]
-
-"""Filter for December 2024"""
-dec24 = all_items[
-    (all_items["Date"].dt.year == 2024) &
-    (all_items["Date"].dt.month == 12)
-].copy()
-
-"""Ontario’s CPI used as base reference"""
-on_cpi = dec24.loc[dec24["Jurisdiction"] == "ON", "CPI"].iloc[0]
-
-"""Compute equivalent salary in each province based on CPI ratio"""
-dec24["Equivalent_Salary"] = (100000 * dec24["CPI"] / on_cpi).round(2)
-
-"""Format CPI and salary nicely"""
-dec24["CPI"] = dec24["CPI"].round(1)
-dec24["Equivalent_Salary"] = dec24["Equivalent_Salary"].apply(lambda x: f"${x:,.2f}")
-
-"""Keep only columns we want to show"""
-equiv_salaries = dec24.loc[
-    ~dec24["Jurisdiction"].isin(["ON", "Canada"]),
-    ["Jurisdiction", "CPI", "Equivalent_Salary"]
-].reset_index(drop=True)
-
-print("\nQUESTION 5: EQUIVALENT SALARY TO $100,000 RECEIVED IN ONTARIO IN ALL OTHER PROVINCES (AS AT DECEMBER 2024):")
-print(equiv_salaries)
-
-# Question 6
-"""Read minimum wage data"""
-min_wages = pd.read_csv(filepath + r"\MinimumWages.csv")
-
-"""Find highest and lowest nominal minimum wages"""
-highest_nominal = min_wages.loc[min_wages["Minimum Wage"].idxmax()]
-lowest_nominal = min_wages.loc[min_wages["Minimum Wage"].idxmin()]
-
-print("\nQUESTION 6: HIGHEST AND LOWEST MINIMUM WAGE ON NOMINAL BASIS:")
-print(f"Highest Minimum Wage - {highest_nominal['Province']}: ${highest_nominal['Minimum Wage']:.2f}")
-print(f"Lowest Minimum Wage - {lowest_nominal['Province']}: ${lowest_nominal['Minimum Wage']:.2f}")
-
-"""Use CPI data for December 2024"""
-all_items = df[df["Item"] == "All-items"]
-dec24 = all_items[all_items["Month"] == "Dec-24"].copy()
-
-"""Rename CPI column to match Province column for merge and compute Real Minimum Wage using (Nominal / CPI) × 100"""
-dec24 = dec24.rename(columns={"Jurisdiction": "Province"})
-merged = pd.merge(min_wages, dec24[["Province", "CPI"]], on="Province", how="inner")
-
-merged["Real_Min_Wage"] = (merged["Minimum Wage"] / merged["CPI"]) * 100
-merged["Nominal_Real_Diff"] = merged["Minimum Wage"] - merged["Real_Min_Wage"]
-
-"""Find province with highest real minimum wage"""
-highest_real = merged.loc[merged["Real_Min_Wage"].idxmax()]
-
-print("\nQUESTION 6: HIGHEST REAL MINIMUM WAGE USING CPI NUMBERS FOR DECEMBER 2024:")
-print(f"{highest_real['Province']}: ${highest_real['Real_Min_Wage']:.2f}")
-
-"""Display CPI, nominal, and real wage difference by province"""
-print("\nQUESTION 6: NOMINAL VS REAL MINIMUM WAGE DIFFERENCE (DECEMBER 2024):")
-diff_table = merged[["Province", "CPI", "Minimum Wage", "Real_Min_Wage", "Nominal_Real_Diff"]].copy()
-diff_table["CPI"] = diff_table["CPI"].round(1)
-diff_table["Minimum Wage"] = diff_table["Minimum Wage"].round(2)
-diff_table["Real_Min_Wage"] = diff_table["Real_Min_Wage"].round(2)
-diff_table["Nominal_Real_Diff"] = diff_table["Nominal_Real_Diff"].round(2)
-"""Add $ signs for wage columns"""
-diff_table["Minimum Wage"] = diff_table["Minimum Wage"].apply(lambda x: f"${x:,.2f}")
-diff_table["Real_Min_Wage"] = diff_table["Real_Min_Wage"].apply(lambda x: f"${x:,.2f}")
-diff_table["Nominal_Real_Diff"] = diff_table["Nominal_Real_Diff"].apply(lambda x: f"${x:,.2f}")
-
-print(diff_table.to_string(index=False))
-
-# Question 7
-"""Client wants to calculate the annual % change in CPI for Services across all jurisdictions"""
-"""Filter only rows where Item = "Services" since CPI includes many categories and group by province/region and get the first and last CPI readings for the year"""
-df_services = df.loc[df["Item"] == "Services"]
-annual_stats = df_services.groupby("Jurisdiction")["CPI"].agg(["first", "last"]).reset_index()
-annual_stats["Annual_pct_change"] = ((annual_stats["last"] - annual_stats["first"]) / annual_stats["first"]) * 100
-annual_stats["Annual_pct_change"] = annual_stats["Annual_pct_change"].round(1)
-
-print("\nQUESTION 7: ANNUAL CHANGE IN CPI FOR SERVICES (FIRST VS. LAST MONTH):")
-display_stats = annual_stats.copy()
-display_stats["Annual_pct_change"] = display_stats["Annual_pct_change"].map(lambda x: f"{x:.1f}%")
-print(display_stats)
-
-top_services = annual_stats.loc[annual_stats["Annual_pct_change"].idxmax()]
-
-# Question 8
-"""Client wants to identify the region with the highest annual inflation in Services"""
-print("\nQUESTION 8: REGION WITH THE HIGHEST INFLATION IN SERVICES:")
-print("Jurisdiction:", top_services["Jurisdiction"])
-print("Inflation Value (%):", f"{top_services['Annual_pct_change']:.1f}%")
-
-# SAVE ALL QUESTION OUTPUTS TO ONE EXCEL FILE
-from openpyxl.styles import Font, Alignment, PatternFill
-from openpyxl.utils import get_column_letter
-
-excel_out = "CPI_Analysis_Results.xlsx"
-
-with pd.ExcelWriter(excel_out, engine="openpyxl") as writer:
-    # Q2 – first 12 rows
-    df[["Item", "Month", "Jurisdiction", "CPI"]].head(12).to_excel(
-        writer, sheet_name="Q2_First12Rows", index=False
-    )
-
-    # Q3 – average month-to-month % change pivot table
-    avg_pivot.reset_index().to_excel(writer, sheet_name="Q3_AvgMoMChange", index=False)
-
-    # Q4 – provinces with highest average change
-    top_prov.to_excel(writer, sheet_name="Q4_TopProvince", index=False)
-
-    # Q5 – equivalent salary table
-    equiv_salaries.to_excel(writer, sheet_name="Q5_EquivalentSalary", index=False)
-
-    # Q6 – nominal vs real minimum wage difference
-    diff_table.to_excel(writer, sheet_name="Q6_NominalVsRealDiff", index=False)
-
-
-    # Q7 – services inflation table
-    annual_stats.to_excel(writer, sheet_name="Q7_ServicesInflation", index=False)
-
-    # Q8 – single-row summary of top region
-    pd.DataFrame([top_services]).to_excel(writer, sheet_name="Q8_TopRegion", index=False)
-
-    # Apply formatting to every worksheet 
-    wb = writer.book
-    for ws in wb.worksheets:
-        header_fill = PatternFill(start_color="D9D9D9", end_color="D9D9D9", fill_type="solid")
-        for col_idx, col_name in enumerate(ws.iter_cols(1, ws.max_column), start=1):
-            col_letter = get_column_letter(col_idx)
-            header_cell = ws[f"{col_letter}1"]
-            header_cell.font = Font(bold=True)
-            header_cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-            header_cell.fill = header_fill
-
-            # Auto-fit column width
-            max_len = max(
-                (len(str(cell.value)) if cell.value is not None else 0 for cell in col_name),
-                default=len(col_name),
-            )
-            ws.column_dimensions[col_letter].width = max_len + 2
-
-        # Apply currency format only to Q6’s wage columns
-        if ws.title == "Q6_NominalVsRealDiff":
-            for col in ["C", "D", "E"]:  # Minimum Wage, Real_Min_Wage, Nominal_Real_Diff
-                for cell in ws[col][1:]:
-                    cell.number_format = u'"$"#,##0.00'
-
-        # Apply percent-like format to Annual_pct_change for Q7 and Q8
-        if ws.title in ("Q7_ServicesInflation", "Q8_TopRegion"):
-            # Find the column that contains 'Annual_pct_change'
-            for cell in ws[1]:
-                if str(cell.value) == "Annual_pct_change":
-                    pct_col_letter = cell.column_letter
-                    # Format as number with a literal % sign (no scaling)
-                    for c in ws[pct_col_letter][1:]:
-                        c.number_format = '0.0"%"'
-                    break
-
-print(f"\nAll question outputs have been saved to: {excel_out}")
+from Instrumentation import instrumented
+from ReportExport import CURRENCY_FORMAT, export_tables
+
+# Number formats for the report worksheets: currency for Q6's wage columns, a literal % sign (no scaling) for Q7/Q8
+PERCENT_FORMAT = '0.0"%"'
+REPORT_NUMBER_FORMATS = {
+    "Q6_NominalVsRealDiff": {"Minimum Wage": CURRENCY_FORMAT, "Real_Min_Wage": CURRENCY_FORMAT, "Nominal_Real_Diff": CURRENCY_FORMAT},
+    "Q7_ServicesInflation": {"Annual_pct_change": PERCENT_FORMAT},
+    "Q8_TopRegion": {"Annual_pct_change": PERCENT_FORMAT},
+}
+
+
+def format_currency(values):
+    """Format amounts as "$1,234.56" text for display (rounded to cents)."""
+    return pd.Series(values).map("${:,.2f}".format)
+
+
+CPI_JURISDICTIONS = ("Canada", "AB", "BC", "MB", "NB", "NL", "NS", "ON", "PEI", "QC", "SK")
+CPI_FILE_NAME = "{}.CPI.1810000401.csv"
+CPI_CACHE_KEYS = ("source", "mtime_ns", "size", "sha1", "items", "months", "cpi", "mom")
+
+
+def _freeze(value):
+    """Hashable stand-in for an argument: lists, tuples, arrays and Indexes become tuples."""
+    if isinstance(value, (list, tuple, np.ndarray, pd.Index)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _memoized(method):
+    """Compute a derived table once per instance and argument set; later calls get a copy, so callers can modify it freely.
+    The memo is cleared whenever the data changes (load_cpi_data, append_month)."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (method.__name__, _freeze(args), _freeze(tuple(sorted(kwargs.items()))))
+        if key not in self._memo:
+            self._memo[key] = method(self, *args, **kwargs)
+        return self._memo[key].copy()
+    return wrapper
+
+
+@instrumented(rows=None)
+def export_report(tables, path="CPI_Analysis_Results.xlsx", backend="excel"):
+    """Write the question tables {sheet name: DataFrame} with ReportExport: one workbook for "excel", or one file per
+    question ("csv", "parquet") or one SQLite database ("sqlite") for automated consumers."""
+    return export_tables(tables, path, backend, REPORT_NUMBER_FORMATS)
+
+
+class CPICube:
+    """Dense CPI array indexed by (item, jurisdiction, month), built once from the CPI files.
+    Labels are turned into integer positions with hash-based pandas Indexes, so each lookup costs the same however many rows
+    the long data frame has. Months are in chronological order; missing combinations are NaN.
+    Values are float64 at the published one-decimal precision."""
+
+    def __init__(self, values, items, jurisdictions, months, dates):
+        self.values = values
+        self.items = items
+        self.jurisdictions = jurisdictions
+        self.months = months
+        self.dates = dates
+
+    def _position(self, labels, key):
+        """Integer position(s) for a label or an array-like of labels (any shape), or everything when key is None."""
+        if key is None:
+            return slice(None)
+        if isinstance(key, str):
+            return labels.get_loc(key)
+        key = np.asarray(key)
+        positions = labels.get_indexer(key.ravel())
+        if (positions < 0).any():
+            raise KeyError(f"Unknown labels: {sorted(set(key.ravel()[positions < 0].tolist()))}")
+        return positions.reshape(key.shape)
+
+    def get(self, item, jurisdiction=None, month=None):
+        """Return the CPI for one item, one or more jurisdictions and one or more month labels (e.g., 'Dec-24').
+        A single label gives a scalar on that axis; None selects the whole axis."""
+        return self.values[
+            self._position(self.items, item),
+            self._position(self.jurisdictions, jurisdiction),
+            self._position(self.months, month),
+        ]
+
+    def at_month(self, item, month):
+        """Return the item's CPI in every jurisdiction for one month label, as a Series indexed by jurisdiction."""
+        return pd.Series(self.get(item, month=month), index=self.jurisdictions, name="CPI")
+
+
+class InflationMetrics:
+    """Running inflation metrics for every (item, jurisdiction) pair, updated one month at a time.
+    append_month() touches only items x jurisdictions arrays, so a new StatCan release is added without rescanning history:
+    MoM % change sums and counts (for the average monthly change), first and last reported CPI (for the change over the
+    period), and the last 12 months of CPI (for the trailing 12-month change)."""
+
+    def __init__(self, items, jurisdictions):
+        self.items = pd.Index(items)
+        self.jurisdictions = pd.Index(jurisdictions)
+        self.months = []
+        shape = (len(self.items), len(self.jurisdictions))
+
+        self.mom_sum = np.zeros(shape)
+        self._mom_compensation = np.zeros(shape)
+        self.mom_count = np.zeros(shape, dtype=int)
+        self.first = np.full(shape, np.nan)
+        self.last = np.full(shape, np.nan)
+        self.previous = np.full(shape, np.nan)
+        self.recent = deque(maxlen=12)
+        self.yoy = np.full(shape, np.nan)
+
+    @classmethod
+    def from_cube(cls, cube):
+        """Build the metrics for a CPICube by appending its months in date order."""
+        metrics = cls(cube.items, cube.jurisdictions)
+        for t, month in enumerate(cube.months):
+            metrics.append_month(month, cube.values[:, :, t])
+        return metrics
+
+    def append_month(self, month, cpi):
+        """Add one month of CPI: an items x jurisdictions array in this object's label order, or a DataFrame with Item rows
+        and jurisdiction columns (e.g., one month of a new release); missing values are NaN."""
+        if isinstance(cpi, pd.DataFrame):
+            cpi = cpi.reindex(index=self.items, columns=self.jurisdictions).to_numpy(dtype=float)
+        cpi = np.asarray(cpi, dtype=float).round(1)
+        reported = ~np.isnan(cpi)
+
+        # MoM % change against the previous month, added with compensated (Kahan) summation like pandas' groupby mean
+        mom = (cpi / self.previous - 1) * 100
+        valid = ~np.isnan(mom)
+        y = np.where(valid, mom - self._mom_compensation, 0.0)
+        total = self.mom_sum + y
+        self._mom_compensation = np.where(valid, (total - self.mom_sum) - y, self._mom_compensation)
+        self.mom_sum = np.where(valid, total, self.mom_sum)
+        self.mom_count += valid
+
+        # Trailing 12-month change uses the CPI from 12 months before this one
+        self.yoy = (cpi / self.recent[0] - 1) * 100 if len(self.recent) == 12 else np.full(cpi.shape, np.nan)
+        self.recent.append(cpi)
+
+        self.first = np.where(np.isnan(self.first), cpi, self.first)
+        self.last = np.where(reported, cpi, self.last)
+        self.previous = cpi
+        self.months.append(month)
+
+    def _long(self, values, name, items=None, mask=None):
+        """Items x jurisdictions array -> long DataFrame (Jurisdiction, Item, name), sorted by jurisdiction then item,
+        keeping only the pairs selected by mask (default: pairs with at least one reported CPI)."""
+        rows = np.arange(len(self.items)) if items is None else self.items.get_indexer(items)
+        rows = np.sort(rows)
+        mask = ~np.isnan(self.first) if mask is None else mask
+        item_idx, jurisdiction_idx = np.nonzero(mask[rows].T)[::-1]
+        return pd.DataFrame({
+            "Jurisdiction": self.jurisdictions[jurisdiction_idx],
+            "Item": self.items[rows[item_idx]],
+            name: values[rows[item_idx], jurisdiction_idx],
+        })
+
+    def avg_monthly_changes(self, items=None):
+        """Average month-to-month % change so far for each jurisdiction and item (optionally only `items`)."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(self.mom_count > 0, self.mom_sum / self.mom_count, np.nan)
+        return self._long(mean, "MoM_pct_change", items)
+
+    def trailing_yoy(self, items=None):
+        """% change between the latest month and 12 months earlier for each jurisdiction and item (NaN until 13 months are in)."""
+        return self._long(self.yoy, "YoY_pct_change", items)
+
+    def period_change(self, items=None):
+        """First and last reported CPI so far and the % change between them for each jurisdiction and item."""
+        change = self._long(self.first, "first", items)
+        change["last"] = self._long(self.last, "last", items)["last"]
+        change["pct_change"] = (change["last"] - change["first"]) / change["first"] * 100
+        return change
+
+
+class CPIAnalysis:
+    """Reads the StatCan CPI files (table 18-10-0004-01, one file per jurisdiction) and MinimumWages.csv for the analysis questions."""
+
+    def __init__(self, cpi_files, wages_file, cache_dir=None):
+        self.cpi_files = list(cpi_files)
+        self.wages_file = wages_file
+        self.cache_dir = cache_dir
+        self._df = None
+        self._cube = None
+        self._metrics = None
+        self._memo = {}
+
+    @classmethod
+    def from_folder(cls, folder, cache_dir=None, jurisdictions=CPI_JURISDICTIONS):
+        """Create an analysis for a StatCan download folder holding <Jurisdiction>.CPI.1810000401.csv files and MinimumWages.csv."""
+        cpi_files = [os.path.join(folder, CPI_FILE_NAME.format(jurisdiction)) for jurisdiction in jurisdictions]
+        return cls(cpi_files, os.path.join(folder, "MinimumWages.csv"), cache_dir=cache_dir)
+
+    @property
+    def df(self):
+        """Combined long-format CPI data frame (files are read on first use)."""
+        if self._df is None:
+            self.load_cpi_data()
+        return self._df
+
+    @property
+    def cube(self):
+        """CPICube of the loaded files (files are read on first use)."""
+        if self._cube is None:
+            self.load_cpi_data()
+        return self._cube
+
+    @property
+    def metrics(self):
+        """InflationMetrics of the loaded files plus any appended months (files are read on first use)."""
+        if self._metrics is None:
+            self.load_cpi_data()
+        return self._metrics
+
+    @staticmethod
+    def _jurisdiction(file_name):
+        """Clean jurisdiction name from the filename (e.g., 'ON', 'BC', 'Canada')"""
+        basename = file_name.replace("\\", "/").split("/")[-1]
+        return basename.split(".")[0]
+
+    @staticmethod
+    def _normalize_months(labels):
+        """Turn month labels like '24-Jan' into 'Jan-24' (labels already in 'Mon-YY' form are unchanged), for all labels at once."""
+        return pd.Index(labels).str.replace(r"^(\d{2})-([A-Za-z]{3})$", r"\2-\1", regex=True)
+
+    def _read_cpi_file(self, file_name):
+        """Read one jurisdiction's wide CPI file and return (items, normalized month labels, CPI, MoM % change),
+        with CPI as an items x months float32 array and the month-to-month % change as float64."""
+        wide = pd.read_csv(file_name)
+        months = self._normalize_months(wide.columns[1:])
+        values = wide.iloc[:, 1:].to_numpy(dtype="float32")
+
+        # Month-to-month % change along each item's row, from the exact one-decimal values
+        exact = values.astype("float64").round(1)
+        mom = np.full(exact.shape, np.nan)
+        mom[:, 1:] = (exact[:, 1:] / exact[:, :-1] - 1) * 100
+        return pd.Index(wide["Item"]), months, values, mom
+
+    @staticmethod
+    def _fingerprint(file_name):
+        """Return (modification time in ns, size in bytes) used to tell whether a CPI file changed."""
+        stat = os.stat(file_name)
+        return stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def _file_hash(file_name):
+        """SHA-1 of the file contents, used when the modification time changed but the size did not."""
+        with open(file_name, "rb") as f:
+            return hashlib.sha1(f.read()).hexdigest()
+
+    def _write_cache(self, cache_file, **arrays):
+        """Write a cache entry to a temporary file in cache_dir and move it into place, so an interrupted write never
+        leaves a partial entry behind."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_file = tempfile.mkstemp(suffix=".npz", dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_file, cache_file)
+        except BaseException:
+            os.remove(tmp_file)
+            raise
+
+    def _load_cpi_file(self, file_name):
+        """Return _read_cpi_file(file_name), using the per-jurisdiction cache in cache_dir when the file is unchanged.
+        A cache entry is reused when the source path, size and modification time match, or when only the modification
+        time differs but the contents hash the same (the entry's modification time is then updated, so the next load
+        skips the hash). Otherwise, or when the entry cannot be read, the file is re-read and its cache entry rewritten."""
+        if self.cache_dir is None:
+            return self._read_cpi_file(file_name)
+
+        source = os.path.abspath(file_name)
+        mtime_ns, size = self._fingerprint(file_name)
+        cache_file = os.path.join(self.cache_dir, f"{self._jurisdiction(file_name)}.npz")
+
+        if os.path.exists(cache_file):
+            # A damaged entry, or one from another layout (missing or malformed keys), is a cache miss and is rewritten
+            try:
+                with np.load(cache_file, allow_pickle=False) as npz:
+                    cached = {key: npz[key] for key in CPI_CACHE_KEYS}
+                same_file = str(cached["source"]) == source and int(cached["size"]) == size
+                same_mtime = int(cached["mtime_ns"]) == mtime_ns
+                sha1 = str(cached["sha1"])
+            except (OSError, ValueError, TypeError, KeyError, zipfile.BadZipFile):
+                same_file = False
+            if same_file and (same_mtime or sha1 == self._file_hash(file_name)):
+                if not same_mtime:
+                    cached["mtime_ns"] = np.asarray(mtime_ns)
+                    self._write_cache(cache_file, **cached)
+                return pd.Index(cached["items"]), pd.Index(cached["months"]), cached["cpi"], cached["mom"]
+
+        items, months, values, mom = self._read_cpi_file(file_name)
+        self._write_cache(
+            cache_file,
+            source=source, mtime_ns=mtime_ns, size=size, sha1=self._file_hash(file_name),
+            items=items.to_numpy(dtype=str), months=months.to_numpy(dtype=str), cpi=values, mom=mom,
+        )
+        return items, months, values, mom
+
+    @instrumented()
+    def load_cpi_data(self, max_workers=None):
+        """Read and combine all CPI files into one DataFrame: Item, Month, Jurisdiction, CPI, Date and MoM_pct_change.
+        Files are read in parallel threads (or taken from cache_dir when unchanged) and the long frame is built once, in
+        the same row order as melting each file and concatenating. Item, Month and Jurisdiction are stored as
+        categoricals and CPI as float32 (index values are published to one decimal place)."""
+        with ThreadPoolExecutor(max_workers=max_workers or min(32, len(self.cpi_files))) as pool:
+            parts = list(pool.map(self._load_cpi_file, self.cpi_files))
+
+        jurisdictions = [self._jurisdiction(file_name) for file_name in self.cpi_files]
+        all_items = pd.Index(sorted(set().union(*(items for items, _, _, _ in parts))))
+        all_months = pd.Index(sorted(set().union(*(months for _, months, _, _ in parts))))
+        all_jurisdictions = pd.Index(sorted(set(jurisdictions)))
+
+        # Melt order: month by month, every item within a month
+        item_codes, month_codes, jurisdiction_codes, cpi, mom = [], [], [], [], []
+        for jurisdiction, (items, months, values, changes) in zip(jurisdictions, parts):
+            n_items, n_months = values.shape
+            item_codes.append(np.tile(all_items.get_indexer(items), n_months))
+            month_codes.append(np.repeat(all_months.get_indexer(months), n_items))
+            jurisdiction_codes.append(np.full(n_items * n_months, all_jurisdictions.get_loc(jurisdiction)))
+            cpi.append(values.ravel(order="F"))
+            mom.append(changes.ravel(order="F"))
+
+        df = pd.DataFrame({
+            "Item": pd.Categorical.from_codes(np.concatenate(item_codes), all_items),
+            "Month": pd.Categorical.from_codes(np.concatenate(month_codes), all_months),
+            "Jurisdiction": pd.Categorical.from_codes(np.concatenate(jurisdiction_codes), all_jurisdictions),
+            "CPI": np.concatenate(cpi),
+        })
+
+        # Parse each distinct month label once instead of once per row
+        month_dates = pd.to_datetime(all_months, format="%b-%y")
+        df["Date"] = month_dates[df["Month"].cat.codes].to_numpy()
+        df["MoM_pct_change"] = np.concatenate(mom)
+
+        self._df = df
+        self._cube = self._build_cube(parts, jurisdictions, all_items, all_jurisdictions, all_months, month_dates)
+        self._metrics = InflationMetrics.from_cube(self._cube)
+        self._memo.clear()
+        return df
+
+    @staticmethod
+    def _build_cube(parts, jurisdictions, all_items, all_jurisdictions, all_months, month_dates):
+        """Scatter every file's items x months block into one items x jurisdictions x months CPICube (months in date order)."""
+        order = np.argsort(month_dates.to_numpy(), kind="stable")
+        months = all_months[order]
+        values = np.full((len(all_items), len(all_jurisdictions), len(months)), np.nan)
+        for jurisdiction, (items, file_months, cpi, _) in zip(jurisdictions, parts):
+            values[
+                all_items.get_indexer(items)[:, None],
+                all_jurisdictions.get_loc(jurisdiction),
+                months.get_indexer(file_months)[None, :],
+            ] = cpi.astype("float64").round(1)
+        return CPICube(values, all_items, all_jurisdictions, months, month_dates[order])
+
+    def append_month(self, month, cpi):
+        """Add a newly published month (items x jurisdictions array or DataFrame, see InflationMetrics.append_month) to the
+        running metrics used by avg_monthly_changes(), province_with_highest_change() and services_inflation().
+        df and cube keep describing the loaded files; call load_cpi_data() again to rebuild them."""
+        self.metrics.append_month(month, cpi)
+        self._memo.clear()
+
+    @instrumented()
+    @_memoized
+    def min_wages(self):
+        """MinimumWages.csv as a DataFrame (Province, Minimum Wage)."""
+        return pd.read_csv(self.wages_file)
+
+    @instrumented()
+    @_memoized
+    def avg_monthly_changes(self, items=None):
+        """Average month-to-month % change by jurisdiction and item: DataFrame with Jurisdiction, Item and MoM_pct_change."""
+        return self.metrics.avg_monthly_changes(items)
+
+    @instrumented()
+    @_memoized
+    def province_with_highest_change(self, items=None, exclude=("Canada",)):
+        """Province(s) with the highest average monthly change for each item, comparing values rounded to one decimal
+        (ties are all kept). Returns avg_monthly_changes() rows plus MoM_rounded, sorted by Item then Jurisdiction."""
+        prov_only = self.avg_monthly_changes(items)
+        prov_only = prov_only.loc[~prov_only["Jurisdiction"].isin(exclude)].copy()
+        prov_only["MoM_rounded"] = prov_only["MoM_pct_change"].round(1)
+        max_by_item = prov_only.groupby("Item")["MoM_rounded"].transform("max")
+        top_prov = prov_only.loc[prov_only["MoM_rounded"] == max_by_item]
+        return top_prov.sort_values(["Item", "Jurisdiction"]).reset_index(drop=True)
+
+    @instrumented()
+    @_memoized
+    def services_inflation(self, item="Services"):
+        """% change in the item's CPI from the first to the last reported month in each jurisdiction:
+        DataFrame with Jurisdiction, first, last and Annual_pct_change (unrounded)."""
+        change = self.metrics.period_change([item])
+        return change.drop(columns="Item").rename(columns={"pct_change": "Annual_pct_change"})
+
+    @instrumented()
+    @_memoized
+    def region_with_highest_services_inflation(self, item="Services"):
+        """Row of services_inflation() with the highest change, comparing values rounded to one decimal (first one on ties)."""
+        stats = self.services_inflation(item)
+        stats["Annual_pct_change"] = stats["Annual_pct_change"].round(1)
+        return stats.loc[stats["Annual_pct_change"].idxmax()]
+
+    @instrumented()
+    def equivalent_salary(self, salaries, base="ON", months="Dec-24", item="All-items"):
+        """Salary in every jurisdiction equivalent to `salaries` earned in `base`, using the item's CPI in `months`:
+        salary x CPI(jurisdiction, month) / CPI(base, month).
+        salaries, base and months may be scalars or arrays and are broadcast together; the result has their broadcast
+        shape plus a last axis over cube.jurisdictions. For example, salaries[:, None, None], base=cube.jurisdictions.to_numpy()[:, None]
+        and months=cube.months gives every employee x base x month x jurisdiction. Values are unrounded."""
+        cpi = self.cube.get(item)
+        salaries = np.asarray(salaries, dtype=float)
+        base_pos = self.cube._position(self.cube.jurisdictions, np.asarray(base))
+        month_pos = self.cube._position(self.cube.months, np.asarray(months))
+        salaries, base_pos, month_pos = np.broadcast_arrays(salaries, base_pos, month_pos)
+
+        equivalent = salaries * cpi[:, month_pos] / cpi[base_pos, month_pos]
+        return np.moveaxis(equivalent, 0, -1)
+
+    @instrumented()
+    @_memoized
+    def min_wage_summary(self, months=None, item="All-items"):
+        """Nominal vs real (CPI-adjusted) minimum wage for every province in MinimumWages.csv that has CPI data, in each
+        of `months` (a month label or list of labels; default every month). Returns one row per province and month
+        (provinces in file order): Province, Month, CPI, Minimum Wage, Real_Min_Wage = Minimum Wage / CPI x 100 and
+        Nominal_Real_Diff. Values are unrounded."""
+        min_wages = self.min_wages()
+        min_wages = min_wages.loc[min_wages["Province"].isin(self.cube.jurisdictions)].reset_index(drop=True)
+        months = self.cube.months if months is None else pd.Index(np.atleast_1d(months))
+
+        cpi = self.cube.get(item, min_wages["Province"].to_numpy()[:, None], months.to_numpy()[None, :])
+        nominal = np.repeat(min_wages["Minimum Wage"].to_numpy(dtype=float), len(months))
+        real = nominal / cpi.ravel() * 100
+
+        return pd.DataFrame({
+            "Province": np.repeat(min_wages["Province"].to_numpy(), len(months)),
+            "Month": np.tile(months.to_numpy(), len(min_wages)),
+            "CPI": cpi.ravel(),
+            "Minimum Wage": nominal,
+            "Real_Min_Wage": real,
+            "Nominal_Real_Diff": nominal - real,
+        })
+
+    def print_head(self, n=12):
+        """Display the first n rows of the combined data frame (CPI shown at its published one-decimal precision)."""
+        head = self.df[["Item", "Month", "Jurisdiction", "CPI"]].head(n).copy()
+        head["CPI"] = head["CPI"].astype("float64").round(1)
+        print(head)
+
+
+if __name__ == "__main__":
+    # Question 1
+    """Edit to match the full path to your CSV folder which contains unzipped folders (or pass it as the first argument)"""
+    filepath = sys.argv[1] if len(sys.argv) > 1 else r"C:\Users\Owner\OneDrive - York University\Documents\FINE 3300\A2 Data\A2 Data"
+    analysis = CPIAnalysis.from_folder(filepath)
+    df = analysis.load_cpi_data().copy()   # the script's working copy; analysis.df keeps CPI as float32
+
+    # Question 2
+    """Client wants to display the first 12 rows of the combined CPI data frame"""
+    pd.set_option('display.max_colwidth', None)  # show full text in columns
+
+    print("QUESTION 2: FIRST 12 LINES OF THE COMBINED DATAFRAME:")
+    analysis.print_head()
+
+    # Question 3
+    """Client wants to calculate the average month-to-month % change for Food, Shelter, and All-items (excluding food & energy),and display them in a wide table by province and Canada."""
+    """CPI is stored as float32; restore the exact one-decimal values in float64 for the calculations"""
+    """MoM_pct_change (month-to-month % change within each jurisdiction and item) is computed by load_cpi_data()"""
+    df["CPI"] = df["CPI"].astype("float64").round(1)
+    """Average monthly change by jurisdiction for the items of interest, from the running metrics built by load_cpi_data()"""
+    items_of_interest = ["All-items excluding food and energy", "Food", "Shelter"]
+    avg_change = analysis.avg_monthly_changes(items_of_interest)
+    """Pivot to make items columns (wide format)"""
+    avg_pivot = avg_change.pivot(index="Jurisdiction", columns="Item", values="MoM_pct_change")
+    """# Round to one decimal and format with '%'"""
+    avg_pivot = avg_pivot.round(1).astype(str) + "%"
+    """Sort alphabetically by jurisdiction"""
+    avg_pivot = avg_pivot.sort_index()
+    print("\nQUESTION 3: AVERAGE MONTH-TO-MONTH CHANGE (DISPLAYED BY CATEGORY):")
+    print(avg_pivot.reset_index())
+
+    # Question 4
+    """Client wants to identify all provinces that have the highest average change in each category."""
+    """Canada is excluded from the comparison; values are rounded to one decimal first and ties are all kept"""
+    top_prov = analysis.province_with_highest_change(items_of_interest)
+
+    print("\nQUESTION 4: PROVINCE(S) WITH THE HIGHEST AVERAGE CHANGE FOR EACH ITEM:")
+    for item, group in top_prov.groupby("Item"):
+        prov_list = ", ".join(group["Jurisdiction"])
+        change_val = group["MoM_rounded"].iloc[0]
+        print(f"{item}: {prov_list} - {change_val}%")
+
+
+    # Question 5
+    """Client wants to compute equivalent salaries across provinces using Dec-24 All-items CPI and display both CPI and equivalent salary values."""
+    """All-items CPI in every jurisdiction for December 2024, with Ontario’s CPI as the base reference"""
+    dec24 = analysis.cube.at_month("All-items", "Dec-24").rename_axis("Jurisdiction").reset_index()
+    dec24["Equivalent_Salary"] = analysis.equivalent_salary(100000, "ON", "Dec-24").round(2)
+
+    """Format CPI and salary nicely"""
+    dec24["CPI"] = dec24["CPI"].round(1)
+    dec24["Equivalent_Salary"] = format_currency(dec24["Equivalent_Salary"])
+
+    """Keep only columns we want to show"""
+    equiv_salaries = dec24.loc[
+        ~dec24["Jurisdiction"].isin(["ON", "Canada"]),
+        ["Jurisdiction", "CPI", "Equivalent_Salary"]
+    ].reset_index(drop=True)
+
+    print("\nQUESTION 5: EQUIVALENT SALARY TO $100,000 RECEIVED IN ONTARIO IN ALL OTHER PROVINCES (AS AT DECEMBER 2024):")
+    print(equiv_salaries)
+
+    # Question 6
+    """Read minimum wage data"""
+    min_wages = analysis.min_wages()
+
+    """Find highest and lowest nominal minimum wages"""
+    highest_nominal = min_wages.loc[min_wages["Minimum Wage"].idxmax()]
+    lowest_nominal = min_wages.loc[min_wages["Minimum Wage"].idxmin()]
+
+    print("\nQUESTION 6: HIGHEST AND LOWEST MINIMUM WAGE ON NOMINAL BASIS:")
+    print(f"Highest Minimum Wage - {highest_nominal['Province']}: ${highest_nominal['Minimum Wage']:.2f}")
+    print(f"Lowest Minimum Wage - {lowest_nominal['Province']}: ${lowest_nominal['Minimum Wage']:.2f}")
+
+    """Use CPI data for December 2024 to compute Real Minimum Wage = (Nominal / CPI) × 100 (provinces without CPI data are dropped)"""
+    merged = analysis.min_wage_summary("Dec-24")
+
+    """Find province with highest real minimum wage"""
+    highest_real = merged.loc[merged["Real_Min_Wage"].idxmax()]
+
+    print("\nQUESTION 6: HIGHEST REAL MINIMUM WAGE USING CPI NUMBERS FOR DECEMBER 2024:")
+    print(f"{highest_real['Province']}: ${highest_real['Real_Min_Wage']:.2f}")
+
+    """Display CPI, nominal, and real wage difference by province"""
+    print("\nQUESTION 6: NOMINAL VS REAL MINIMUM WAGE DIFFERENCE (DECEMBER 2024):")
+    diff_table = merged[["Province", "CPI", "Minimum Wage", "Real_Min_Wage", "Nominal_Real_Diff"]].copy()
+    diff_table["CPI"] = diff_table["CPI"].round(1)
+    diff_table["Minimum Wage"] = diff_table["Minimum Wage"].round(2)
+    diff_table["Real_Min_Wage"] = diff_table["Real_Min_Wage"].round(2)
+    diff_table["Nominal_Real_Diff"] = diff_table["Nominal_Real_Diff"].round(2)
+    """Add $ signs for wage columns"""
+    for col in ["Minimum Wage", "Real_Min_Wage", "Nominal_Real_Diff"]:
+        diff_table[col] = format_currency(diff_table[col])
+
+    print(diff_table.to_string(index=False))
+
+    # Question 7
+    """Client wants to calculate the annual % change in CPI for Services across all jurisdictions"""
+    """First and last Services CPI readings for the year in each province/region, from the running metrics"""
+    annual_stats = analysis.services_inflation()
+    annual_stats["Annual_pct_change"] = annual_stats["Annual_pct_change"].round(1)
+
+    print("\nQUESTION 7: ANNUAL CHANGE IN CPI FOR SERVICES (FIRST VS. LAST MONTH):")
+    display_stats = annual_stats.copy()
+    display_stats["Annual_pct_change"] = display_stats["Annual_pct_change"].map(lambda x: f"{x:.1f}%")
+    print(display_stats)
+
+    top_services = analysis.region_with_highest_services_inflation()
+
+    # Question 8
+    """Client wants to identify the region with the highest annual inflation in Services"""
+    print("\nQUESTION 8: REGION WITH THE HIGHEST INFLATION IN SERVICES:")
+    print("Jurisdiction:", top_services["Jurisdiction"])
+    print("Inflation Value (%):", f"{top_services['Annual_pct_change']:.1f}%")
+
+    # SAVE ALL QUESTION OUTPUTS TO ONE EXCEL FILE
+    excel_out = "CPI_Analysis_Results.xlsx"
+    export_report({
+        "Q2_First12Rows": df[["Item", "Month", "Jurisdiction", "CPI"]].head(12),  # Q2 – first 12 rows
+        "Q3_AvgMoMChange": avg_pivot.reset_index(),  # Q3 – average month-to-month % change pivot table
+        "Q4_TopProvince": top_prov,  # Q4 – provinces with highest average change
+        "Q5_EquivalentSalary": equiv_salaries,  # Q5 – equivalent salary table
+        "Q6_NominalVsRealDiff": diff_table,  # Q6 – nominal vs real minimum wage difference
+        "Q7_ServicesInflation": annual_stats,  # Q7 – services inflation table
+        "Q8_TopRegion": pd.DataFrame([top_services]),  # Q8 – single-row summary of top region
+    }, excel_out)
+
+    print(f"\nAll question outputs have been saved to: {excel_out}")
@@ -0,0 +1,242 @@
+# Instrumentation for the mortgage and CPI libraries.
+# Client wants to see where a slow nightly run spends its time: schedule building, DataFrame construction, report export,
+# chart rendering or the CPI analysis steps.
+# Public operations are wrapped with @instrumented and script steps with `with stage(name):`; each call becomes one record:
+#   {"stage", "wall_s", "rows", "peak_bytes", "depth", "parent", "pid", "run_id", "time"}
+# Off by default: a disabled wrapper only checks one flag before calling through.
+# Modes (enable(...) or environment variables, read at import):
+#   - timing:  wall time and row counts                               INSTRUMENTATION_LOG=records.jsonl
+#   - memory:  plus peak traced memory per stage (tracemalloc)        INSTRUMENTATION_MEMORY=1
+#   - profile: plus a cProfile capture of every top-level stage,     INSTRUMENTATION_PROFILE=folder
+#              saved as <folder>/<stage>-<n>.prof with the top functions in the record
+# Records are appended to a JSON lines file (one JSON object per line), so runs can be concatenated and aggregated.
+# Public functions:
+#   - enable(path, memory, profile_dir) / disable() / is_enabled()
+#   - instrumented(name, rows): decorator for functions and methods
+#   - stage(name, rows): context manager for a block of code
+#   - records() / clear(): records collected in this process
+#   - summarize(paths): aggregate one or more JSON lines files by stage (calls, total/mean/max time, rows, peak memory)
+# Assumes values have been validated.
+
+import cProfile
+import functools
+import io
+import itertools
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+
+
+class _Settings:
+    """Process-wide instrumentation switches and the collected records."""
+
+    def __init__(self):
+        self.enabled = False
+        self.path = None
+        self.memory = False
+        self.started_tracing = False
+        self.profile_dir = None
+        self.run_id = None
+        self.records = []
+        self.lock = threading.Lock()
+        self.profile_count = itertools.count()
+
+
+_settings = _Settings()
+_local = threading.local()
+
+
+def enable(path=None, memory=False, profile_dir=None):
+    """Start recording. path: JSON lines file to append records to (None keeps them in memory only);
+    memory: record peak traced memory per stage; profile_dir: save a cProfile capture of every top-level stage there."""
+    _settings.path = path
+    _settings.memory = memory
+    _settings.profile_dir = profile_dir
+    _settings.run_id = uuid.uuid4().hex[:12]
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _settings.started_tracing = True
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+    _settings.enabled = True
+
+
+def disable():
+    """Stop recording (tracemalloc is stopped only if enable() started it; a caller's own tracing session is left running)."""
+    _settings.enabled = False
+    if _settings.started_tracing and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _settings.started_tracing = False
+    _settings.memory = False
+    _settings.profile_dir = None
+
+
+def is_enabled():
+    return _settings.enabled
+
+
+def records():
+    """Records collected in this process since the last clear()."""
+    with _settings.lock:
+        return list(_settings.records)
+
+
+def clear():
+    with _settings.lock:
+        _settings.records.clear()
+
+
+def count_rows(result):
+    """Number of rows in a result: DataFrame/Series/array length, summed over dictionaries, lists and tuples of them."""
+    if isinstance(result, dict):
+        result = list(result.values())
+    if isinstance(result, (list, tuple)):
+        counts = [count_rows(item) for item in result]
+        counts = [n for n in counts if n is not None]
+        return sum(counts) if counts else None
+    n_periods = getattr(result, "n_periods", None)
+    if n_periods is not None:
+        return int(n_periods.sum())
+    shape = getattr(result, "shape", None)
+    if shape:
+        return int(shape[0])
+    return None
+
+
+def _profile_top(profiler, limit=10):
+    """The `limit` functions with the highest cumulative time in a cProfile capture."""
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    top = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+    return [
+        {"function": f"{os.path.basename(file)}:{line}({name})", "calls": calls, "cumulative_s": round(cumulative, 6)}
+        for (file, line, name), (_, calls, _, cumulative, _) in top
+    ]
+
+
+def _write(record):
+    with _settings.lock:
+        _settings.records.append(record)
+        if _settings.path:
+            with open(_settings.path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+
+@contextmanager
+def _recording(name, rows=None):
+    """Time the block (and optionally trace memory / profile it) and write one record; yields a dict whose "rows" entry
+    the block may set."""
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    parent = stack[-1] if stack else None
+    frame = {"name": name, "rows": rows, "peak": 0, "start": 0}
+
+    if _settings.memory and tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        if parent is not None:
+            parent["peak"] = max(parent["peak"], peak)
+        tracemalloc.reset_peak()
+        frame["start"] = current
+
+    profiler = None
+    if _settings.profile_dir and parent is None:
+        profiler = cProfile.Profile()
+
+    stack.append(frame)
+    start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield frame
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        wall = time.perf_counter() - start
+        stack.pop()
+
+        record = {
+            "stage": name,
+            "wall_s": round(wall, 6),
+            "rows": frame["rows"],
+            "peak_bytes": None,
+            "depth": len(stack),
+            "parent": parent["name"] if parent else None,
+            "pid": os.getpid(),
+            "run_id": _settings.run_id,
+            "time": time.time(),
+        }
+        if _settings.memory and tracemalloc.is_tracing():
+            frame["peak"] = max(frame["peak"], tracemalloc.get_traced_memory()[1])
+            record["peak_bytes"] = frame["peak"] - frame["start"]
+            if parent is not None:
+                parent["peak"] = max(parent["peak"], frame["peak"])
+        if profiler is not None:
+            prof_file = os.path.join(_settings.profile_dir, f"{name.replace(' ', '_')}-{next(_settings.profile_count)}.prof")
+            profiler.dump_stats(prof_file)
+            record["profile"] = prof_file
+            record["profile_top"] = _profile_top(profiler)
+        _write(record)
+
+
+@contextmanager
+def stage(name, rows=None):
+    """Record a block of code as one stage (does nothing when instrumentation is off). Set rows up front or assign
+    the yielded dict's "rows" entry inside the block."""
+    if not _settings.enabled:
+        yield {}
+        return
+    with _recording(name, rows) as frame:
+        yield frame
+
+
+def instrumented(name=None, rows=count_rows):
+    """Decorator recording each call as a stage called `name` (default: the function's qualified name, e.g.
+    MortgagePayment.build_all_schedules). rows(result) gives the row count (default: count_rows)."""
+    def decorator(func):
+        stage_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _settings.enabled:
+                return func(*args, **kwargs)
+            with _recording(stage_name) as frame:
+                result = func(*args, **kwargs)
+                frame["rows"] = rows(result) if rows else None
+            return result
+        return wrapper
+    return decorator
+
+
+def summarize(paths):
+    """Aggregate JSON lines files (one path or a list) by stage: Calls, Total_s, Mean_s, Max_s, Rows and Max_Peak_MB."""
+    import pandas as pd
+
+    paths = [paths] if isinstance(paths, str) else paths
+    entries = []
+    for path in paths:
+        with open(path) as f:
+            entries.extend(json.loads(line) for line in f if line.strip())
+    df = pd.DataFrame(entries, columns=["stage", "wall_s", "rows", "peak_bytes"])
+    summary = df.groupby("stage").agg(
+        Calls=("wall_s", "size"),
+        Total_s=("wall_s", "sum"),
+        Mean_s=("wall_s", "mean"),
+        Max_s=("wall_s", "max"),
+        Rows=("rows", lambda rows: rows.sum(min_count=1)),
+        Max_Peak_MB=("peak_bytes", "max"),
+    )
+    summary["Max_Peak_MB"] = summary["Max_Peak_MB"] / 1e6
+    return summary.sort_values("Total_s", ascending=False)
+
+
+if os.environ.get("INSTRUMENTATION_LOG") or os.environ.get("INSTRUMENTATION_PROFILE"):
+    enable(
+        os.environ.get("INSTRUMENTATION_LOG"),
+        memory=os.environ.get("INSTRUMENTATION_MEMORY", "") not in ("", "0"),
+        profile_dir=os.environ.get("INSTRUMENTATION_PROFILE"),
+    )
@@ -8,15 +8,102 @@
 #                build a loan payment schedule (amortization table) using pandas
 #                generates dataFrames including the columns: Period, Starting Balance, Interest, Payment, Ending Balance
 #                save all 6 schedules into one Excel file with 6 worksheets (one worksheet per payment option)
-#                plot the loan balance decline for all 6 schedules on the same chart
+#                plot the loan balance decline for all 6 schedules on the same chart (BalancePlots.plot_balance_decline)
+# Public Method: iter_schedule(principal, option, chunk_size) yields one schedule's rows (or DataFrame chunks) on demand
+# Public Methods: balance_at(principal, period, option) and cumulative_interest(principal, period, option)
+#                 answer "balance after period k" and "interest paid to period k" in O(1) with the closed-form annuity balance
+# Integer-cents mode: build_all_schedules(principal, rounding="half_even" or "half_up") carries balances as int64 cents and
+#                     rounds interest every period (NumPy arrays, no Decimal), so the schedules reconcile exactly to the cent;
+#                     the last payment of the amortization is trued up so a full amortization ends at $0.00
+# Function: export_schedules(schedules, path, backend) saves the schedules through ReportExport (streaming Excel, CSV or Parquet)
+# Instrumentation: the public methods, _make_schedule, export_schedules and the chart are recorded by Instrumentation when it is
+#                  enabled (e.g. INSTRUMENTATION_LOG=records.jsonl); it is off by default.
+# Quote cache: periodic rates and annuity factors (keyed on EAR and amortization years) are memoized in a shared,
+#              size-bounded cache (quote_cache), so quotes for the same posted rates and amortizations skip the rate and
+#              factor powers whatever the principal; the payment itself is always principal / factor. Use quote_cache.stats()
+#              for hit/miss counts, quote_cache.clear() to invalidate (e.g. after posted rates change) and
+#              quote_cache.maxsize = 0 to switch caching off.
 # Assumes values have been validated. 
 
+import math
+import threading
+
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-from openpyxl.utils import get_column_letter
-from openpyxl.styles import Font, Alignment, PatternFill
-from matplotlib.ticker import FuncFormatter 
+
+from Instrumentation import instrumented, stage
+from ReportExport import CURRENCY_FORMAT, export_tables
+
+
+# Payments per year for each payment option (the rapid plans pay on the bi-weekly and weekly calendars)
+PAYMENT_FREQUENCIES = {
+    "Monthly": 12,
+    "Semi-Monthly": 24,
+    "Bi-Weekly": 26,
+    "Weekly": 52,
+    "Rapid Bi-Weekly": 26,
+    "Rapid Weekly": 52,
+}
+
+# Integer-cents rounding modes: banker's rounding (round half to even) and round half up
+ROUNDING_MODES = {
+    "half_even": np.rint,
+    "half_up": lambda x: np.floor(np.asarray(x) + 0.5),
+}
+
+
+class QuoteCache:
+    """Size-bounded cache of periodic rates and annuity factors shared by every MortgagePayment object.
+    Keys are (EAR, amortization years), so quotes for the same posted rates and amortizations share one entry whatever
+    the principal. Reads are plain dictionary lookups without the lock (dict.get is atomic) and hit/miss
+    counts are kept per thread, so a hit costs about as little as a lookup can; stores and evictions take the lock.
+    Once maxsize entries are held, the oldest stored entry is evicted."""
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._thread_counts = []
+
+    def _counts(self):
+        """This thread's [hits, misses] list (registered on first use so stats() can add them up)."""
+        counts = getattr(self._local, "counts", None)
+        if counts is None:
+            counts = self._local.counts = [0, 0]
+            with self._lock:
+                self._thread_counts.append(counts)
+        return counts
+
+    def lookup(self, key):
+        """Return the cached value for key, or None on a miss."""
+        value = self._entries.get(key)
+        self._counts()[value is None] += 1
+        return value
+
+    def store(self, key, value):
+        """Cache value under key, evicting the oldest entries beyond maxsize."""
+        with self._lock:
+            self._entries[key] = value
+            while len(self._entries) > self.maxsize:
+                del self._entries[next(iter(self._entries))]
+
+    def stats(self):
+        """Return hit/miss counts and the current and maximum number of entries."""
+        with self._lock:
+            hits = sum(counts[0] for counts in self._thread_counts)
+            misses = sum(counts[1] for counts in self._thread_counts)
+            return {"hits": hits, "misses": misses, "size": len(self._entries), "maxsize": self.maxsize}
+
+    def clear(self):
+        """Invalidate every cached factor and reset the statistics."""
+        with self._lock:
+            self._entries.clear()
+            for counts in self._thread_counts:
+                counts[:] = [0, 0]
+
+
+quote_cache = QuoteCache()
 
 
 class MortgagePayment:
@@ -52,24 +139,47 @@ class MortgagePayment:
         """Compute the constant level payment using the annuity factor."""
         return principal / self._annuity_factor(r, n)
 
+    def _compute_rates_and_factors(self):
+        """Return {payments per year: (periodic rate, annuity factor over the amortization)} for the four base frequencies."""
+        factors = {}
+        for f in (12, 24, 26, 52):
+            r = self._periodic_rate(f)
+            factors[f] = (r, self._annuity_factor(r, self._num_payments(self.amort_years, f)))
+        return factors
+
+    def _rates_and_factors(self):
+        """_compute_rates_and_factors(), memoized in quote_cache per (EAR, amortization years): one lookup per quote."""
+        key = (self.ear, self.amort_years)
+        factors = quote_cache.lookup(key)
+        if factors is None:
+            factors = self._compute_rates_and_factors()
+            quote_cache.store(key, factors)
+        return factors
+
+    def _round_cents(self, amount):
+        """Round a payment amount to the nearest cent."""
+        return round(amount, 2)
+
+    @instrumented()
     def payments(self, principal):
         """Calculate payment amounts for 6 frequencies and return as tuple."""
         freqs = (12, 24, 26, 52)
+        factors = self._rates_and_factors()
         base_payments = []
 
         # Compute regular payments
         for f in freqs:
-            r = self._periodic_rate(f)
-            n = self._num_payments(self.amort_years, f)
-            pay = self._payment_amount(principal, r, n)
-            base_payments.append(round(pay, 2))
+            _, factor = factors[f]
+            pay = principal / factor
+            base_payments.append(self._round_cents(pay))
 
         # Rapid options based on monthly payment
         monthly = base_payments[0]
-        base_payments += [round(monthly / 2, 2), round(monthly / 4, 2)]
+        base_payments += [self._round_cents(monthly / 2), self._round_cents(monthly / 4)]
 
         return tuple(base_payments)
 
+    @instrumented()
     def payment_details(self, principal):
         """Build a dictionary with payment details for all six options."""
         freq_map = {
@@ -79,52 +189,225 @@ class MortgagePayment:
             "Weekly": 52,
         }
 
+        factors = self._rates_and_factors()
         details = {}
         for name, f in freq_map.items():
-            r = self._periodic_rate(f)
-            n_amort = self._num_payments(self.amort_years, f)
             n_term = self._num_payments(self.term_years, f)
-            pay = self._payment_amount(principal, r, n_amort)
+            r, factor = factors[f]
+            pay = principal / factor
             details[name] = (pay, r, n_term)
 
         # Rapid plans
         monthly_pay, _, _ = details["Monthly"]
-        details["Rapid Bi-Weekly"] = (monthly_pay / 2, self._periodic_rate(26), self._num_payments(self.term_years, 26))
-        details["Rapid Weekly"] = (monthly_pay / 4, self._periodic_rate(52), self._num_payments(self.term_years, 52))
+        details["Rapid Bi-Weekly"] = (monthly_pay / 2, factors[26][0], self._num_payments(self.term_years, 26))
+        details["Rapid Weekly"] = (monthly_pay / 4, factors[52][0], self._num_payments(self.term_years, 52))
         return details
 
-    def _make_schedule(self, principal, payment, r, n_term):
-        """Build a single payment schedule DataFrame."""
-        periods, start_bal, interests, pay_list, end_bal = [], [], [], [], []
-        balance = float(principal)
-
-        for t in range(1, n_term + 1):
-            if balance <= 1e-8:
-                break
-            interest = balance * r
-            this_payment = min(payment, balance + interest)
-            new_balance = balance + interest - this_payment
-
-            periods.append(t)
-            start_bal.append(balance)
-            interests.append(interest)
-            pay_list.append(this_payment)
-            end_bal.append(new_balance)
-            balance = new_balance
-
-        df = pd.DataFrame({
-            "Period": periods,
-            "Starting Balance": np.round(start_bal, 2),
-            "Interest Amount": np.round(interests, 2),
-            "Payment": np.round(pay_list, 2),
-            "Ending Balance": np.round(end_bal, 2)
+    def _balance_after(self, principal, payment, r, t):
+        """Closed-form annuity balance after t payments: B_t = P(1 + r)^t - PMT((1 + r)^t - 1) / r (P - PMT * t at a zero rate).
+        Works on scalars or broadcastable arrays; no clamping at payoff."""
+        r = np.asarray(r, dtype=float)
+        growth = (1 + r) ** t
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(r == 0, principal - payment * t, principal * growth - payment * (growth - 1) / r)
+
+    def _amortize(self, principal, payment, r, n_term, first_period=1, opening_balance=None):
+        """Compute Starting Balance, Interest, Payment and Ending Balance for periods first_period..n_term at once.
+        Uses the closed-form annuity balance (_balance_after) instead of stepping period by period.
+        Inputs may be scalars or arrays (one element per loan); outputs have a trailing period axis of length max(n_term) - first_period + 1.
+        opening_balance is the balance before first_period (defaults to the principal when starting at period 1).
+        Returns (start, interest, payments, end, n_rows) where periods past payoff or past the term are zero-filled."""
+        if opening_balance is None:
+            opening_balance = principal
+        principal, payment, r, n_term, opening_balance = np.broadcast_arrays(
+            np.asarray(principal, dtype=float), np.asarray(payment, dtype=float),
+            np.asarray(r, dtype=float), np.asarray(n_term, dtype=int), np.asarray(opening_balance, dtype=float),
+        )
+        t = np.arange(first_period - 1, max(int(n_term.max(initial=0)), first_period - 1) + 1)
+        r_col = r[..., None]
+
+        # Balance after t payments (column 0 is the opening balance)
+        balance = self._balance_after(principal[..., None], payment[..., None], r_col, t)
+
+        # At a zero rate the balance is P - PMT - PMT - ...; accumulate it in that order so rounding drift matches a loop
+        if (r == 0).any():
+            steps = np.repeat(payment[..., None], len(t), axis=-1)
+            steps[..., 0] = opening_balance
+            balance = np.where(r_col == 0, np.subtract.accumulate(steps, axis=-1), balance)
+
+        start = balance[..., :-1]
+        interest = start * r_col
+        end = balance[..., 1:]
+
+        # Stop once the loan is paid off or the term ends. A starting balance under half a cent is rounding
+        # residue left at the end of the amortization, so it does not start another ($0.00) period.
+        active = np.logical_and.accumulate(start >= 0.005, axis=-1) & (t[1:] <= n_term[..., None])
+
+        # Final payment is clamped to what is owed: min(payment, balance + interest)
+        paid_off = end < 0
+        payments = np.where(paid_off, start + interest, payment[..., None])
+        end = np.where(paid_off, 0.0, end)
+
+        start, interest, payments, end = (np.where(active, a, 0.0) for a in (start, interest, payments, end))
+        return start, interest, payments, end, active.sum(axis=-1)
+
+    def _amortize_cents(self, principal, payment, r, n_term, n_amort=None, rounding="half_even"):
+        """Integer-cents version of _amortize: balances are carried in whole cents and each period's interest is rounded
+        to the cent (rounding: "half_even" = banker's, "half_up") before it is added, so every row reconciles exactly:
+        Ending Balance = Starting Balance + Interest Amount - Payment, and each Starting Balance is the previous Ending Balance.
+        The payment is rounded to the cent too, so the payment in the last amortization period (n_amort) is trued up to the
+        balance owing plus interest and a full amortization ends at zero (n_amort=None: no true-up).
+        Steps period by period, vectorized across loans/options. Returns (start, interest, payments, end, n_rows) as int64 cents."""
+        round_cents = ROUNDING_MODES[rounding]
+        principal, payment, r, n_term, n_amort = np.broadcast_arrays(
+            np.asarray(principal, dtype=float), np.asarray(payment, dtype=float),
+            np.asarray(r, dtype=float), np.asarray(n_term, dtype=int), np.asarray(-1 if n_amort is None else n_amort, dtype=int),
+        )
+        # A single schedule is stepped as a batch of one, so each period's rows are arrays the in-place ufuncs can write to
+        scalar = principal.ndim == 0
+        principal, payment, r, n_term, n_amort = np.atleast_1d(principal, payment, r, n_term, n_amort)
+        n_max = int(n_term.max(initial=0))
+
+        # Whole cents held in float64 are exact (sums of integers below 2**53), which avoids an int cast every period.
+        # A paid-off balance stays at zero (zero interest, zero payment), so no per-period masking is needed.
+        balance = round_cents(principal * 100)
+        payment = round_cents(payment * 100)
+        start, interest, payments = (np.zeros((n_max,) + principal.shape) for _ in range(3))
+        for k in range(n_max):
+            start[k] = balance
+            np.multiply(balance, r, out=interest[k])
+            interest[k] = round_cents(interest[k])
+            balance = balance + interest[k]
+            np.minimum(payment, balance, out=payments[k])
+            np.copyto(payments[k], balance, where=n_amort == k + 1)
+            balance -= payments[k]
+
+        # Periods after payoff or after each loan's term are zeroed
+        active = (start > 0) & (np.arange(n_max).reshape((-1,) + (1,) * principal.ndim) < n_term)
+        start, interest, payments = (np.moveaxis(np.where(active, a, 0), 0, -1).astype(np.int64) for a in (start, interest, payments))
+        n_rows = active.sum(axis=0)
+        if scalar:
+            start, interest, payments, n_rows = start[0], interest[0], payments[0], n_rows[0]
+        return start, interest, payments, start + interest - payments, n_rows
+
+    def _schedule_frame(self, first_period, start, interest, payments, end):
+        """Build a schedule DataFrame (amounts rounded to cents) from period arrays starting at first_period."""
+        return pd.DataFrame({
+            "Period": np.arange(first_period, first_period + len(start)),
+            "Starting Balance": np.round(start, 2),
+            "Interest Amount": np.round(interest, 2),
+            "Payment": np.round(payments, 2),
+            "Ending Balance": np.round(end, 2)
         })
-        return df
 
-    def build_all_schedules(self, principal):
-        """Generate all 6 amortization schedules."""
+    @instrumented()
+    def _make_schedule(self, principal, payment, r, n_term, rounding=None, n_amort=None):
+        """Build a single payment schedule DataFrame (in integer cents when rounding is "half_even" or "half_up", with the
+        payment of period n_amort trued up to the balance owing)."""
+        if rounding is None:
+            start, interest, payments, end, n_rows = self._amortize(principal, payment, r, n_term)
+        else:
+            *amounts, n_rows = self._amortize_cents(principal, payment, r, n_term, n_amort, rounding)
+            start, interest, payments, end = (a / 100 for a in amounts)
+        n_rows = int(n_rows)
+        return self._schedule_frame(1, start[:n_rows], interest[:n_rows], payments[:n_rows], end[:n_rows])
+
+    def iter_schedule(self, principal, option="Monthly", chunk_size=None):
+        """Lazily generate one payment option's schedule instead of building the whole DataFrame.
+        Yields (Period, Starting Balance, Interest Amount, Payment, Ending Balance) tuples rounded to cents,
+        or DataFrames of up to chunk_size rows when chunk_size is given. Only one chunk is held in memory at a time."""
+        payment, r, n_term = self.payment_details(principal)[option]
+        step = chunk_size or 256
+        balance = principal
+
+        for first in range(1, n_term + 1, step):
+            last = min(first + step - 1, n_term)
+            start, interest, payments, end, n_rows = self._amortize(principal, payment, r, last, first, balance)
+            n_rows = int(n_rows)
+            if n_rows == 0:
+                return
+
+            chunk = self._schedule_frame(first, start[:n_rows], interest[:n_rows], payments[:n_rows], end[:n_rows])
+            if chunk_size:
+                yield chunk
+            else:
+                yield from chunk.itertuples(index=False, name=None)
+
+            # Paid off inside this chunk
+            if n_rows < last - first + 1:
+                return
+            balance = end[n_rows - 1]
+
+    def _payoff_period(self, principal, payment, r):
+        """First period whose closed-form ending balance is under half a cent (inf if the payment never covers the interest)."""
+        if r == 0:
+            estimate = principal / payment
+        elif payment <= principal * r:
+            return math.inf
+        else:
+            estimate = -math.log(1 - principal * r / payment) / math.log(1 + r)
+
+        # The estimate solves B_t = 0 exactly; step to the half-cent cut-off used by the schedules
+        m = max(1, math.ceil(estimate))
+        while m > 1 and self._balance_after(principal, payment, r, m - 1) < 0.005:
+            m -= 1
+        while self._balance_after(principal, payment, r, m) >= 0.005:
+            m += 1
+        return m
+
+    @instrumented()
+    def balance_at(self, principal, period, option="Monthly"):
+        """Ending balance after a given period in O(1) using the closed form (e.g. the renewal balance at the end of the term).
+        Periods past payoff return 0; periods past the term assume the same payment continues."""
+        payment, r, _ = self.payment_details(principal)[option]
+        period = min(period, self._payoff_period(principal, payment, r))
+        return float(max(self._balance_after(principal, payment, r, period), 0.0))
+
+    @instrumented()
+    def cumulative_interest(self, principal, period, option="Monthly"):
+        """Total interest paid in periods 1..period in O(1): payments made minus principal repaid."""
+        payment, r, _ = self.payment_details(principal)[option]
+        m = min(period, self._payoff_period(principal, payment, r))
+        if m <= 0:
+            return 0.0
+
+        end = float(self._balance_after(principal, payment, r, m))
+        if end < 0:
+            # Final payment was clamped to the balance owing plus interest
+            paid = (m - 1) * payment + float(self._balance_after(principal, payment, r, m - 1)) * (1 + r)
+            end = 0.0
+        else:
+            paid = m * payment
+        return paid - (principal - end)
+
+    @instrumented()
+    def build_all_schedules(self, principal, rounding=None):
+        """Generate all 6 amortization schedules.
+        rounding=None uses the floating-point engine (amounts rounded to cents for display only); "half_even" (banker's)
+        or "half_up" carries balances in integer cents with interest rounded every period, so the schedules reconcile to
+        the cent. In cents mode the six options are stepped together."""
         info = self.payment_details(principal)
-        return {name: self._make_schedule(principal, pay, r, n_term) for name, (pay, r, n_term) in info.items()}
+        if rounding is None:
+            return {name: self._make_schedule(principal, pay, r, n_term) for name, (pay, r, n_term) in info.items()}
+
+        pay, r, n_term = (np.array([details[k] for details in info.values()]) for k in range(3))
+        n_amort = [self._num_payments(self.amort_years, PAYMENT_FREQUENCIES[name]) for name in info]
+        *amounts, n_rows = self._amortize_cents(principal, pay, r, n_term, n_amort, rounding)
+        start, interest, payments, end = (a / 100 for a in amounts)
+        return {
+            name: self._schedule_frame(1, start[j, :n], interest[j, :n], payments[j, :n], end[j, :n])
+            for j, (name, n) in enumerate(zip(info, n_rows))
+        }
+
+
+@instrumented(rows=None)
+def export_schedules(schedules, path, backend="excel"):
+    """Save {option name: schedule DataFrame} with one "<option> Payments" table each, amounts formatted as currency.
+    backend is any ReportExport backend ("excel", "csv", "parquet", ...). Returns the path written."""
+    tables = {f"{name} Payments": df for name, df in schedules.items()}
+    formats = {table: {col: CURRENCY_FORMAT for col in df.columns if col != "Period"} for table, df in tables.items()}
+    export_tables(tables, path, backend=backend, number_formats=formats)
+    return path
 
 
 if __name__ == "__main__":
@@ -148,51 +431,14 @@ if __name__ == "__main__":
     schedules = mortgage.build_all_schedules(principal)
 
     # Save to Excel with sheet names ending in "Payments"
-    excel_file = "Payment_Schedules.xlsx"
-    with pd.ExcelWriter(excel_file, engine="openpyxl") as writer:
-        for name, df in schedules.items():
-            sheet_name = f"{name} Payments"
-            df.to_excel(writer, sheet_name=sheet_name, index=False)
-            ws = writer.sheets[sheet_name]
-
-            # Header formatting
-            header_fill = PatternFill(start_color="D9D9D9", end_color="D9D9D9", fill_type="solid")
-            for col_idx, col_name in enumerate(df.columns, start=1):
-                col_letter = get_column_letter(col_idx)
-                header_cell = ws[f"{col_letter}1"]
-                header_cell.font = Font(bold=True)
-                header_cell.alignment = Alignment(horizontal="center")
-                header_cell.fill = header_fill
-
-                # Auto-fit column width
-                max_len = max((len(str(cell.value)) for cell in ws[col_letter]), default=len(col_name))
-                ws.column_dimensions[col_letter].width = max_len + 2
-
-                # Format numeric columns as currency
-                if col_name != "Period":
-                    for cell in ws[col_letter][1:]:
-                        cell.number_format = u'"$"#,##0.00'
+    excel_file = export_schedules(schedules, "Payment_Schedules.xlsx")
 
     print(f"\nAll 6 mortgage schedules have been saved to: {excel_file}")
 
-  # Plot balance decline for all 6 schedules
-    plt.figure(figsize=(10, 7))
-    for name, df in schedules.items():
-        plt.plot(df["Period"], df["Ending Balance"], label=name)
-    plt.title("Loan Balance Decline by Payment Schedule")
-    plt.xlabel("Payment Period (within term)")
-    plt.ylabel("Ending Balance ($)")
-    plt.legend()
-    plt.grid(True, linestyle="--", linewidth=0.5, alpha=0.6)
-
-    # Format Y-axis with commas (e.g., 100,000 instead of 100000)
-    formatter = FuncFormatter(lambda x, _: f"{x:,.0f}")
-    plt.gca().yaxis.set_major_formatter(formatter)
-
-    plt.tight_layout()
-
-    png_file = "Loan_Balance_Decline.png"
-    plt.savefig(png_file, dpi=200)
-    plt.close()
+    # Plot balance decline for all 6 schedules (headless, see BalancePlots.py)
+    from BalancePlots import plot_balance_decline
+
+    with stage("plot Loan_Balance_Decline.png", rows=sum(len(df) for df in schedules.values())):
+        png_file = plot_balance_decline(schedules, "Loan_Balance_Decline.png")
 
     print(f"Loan balance decline graph saved to: {png_file}")
\ No newline at end of file
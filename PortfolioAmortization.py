@@ -0,0 +1,181 @@
+# Part A extension: Portfolio-scale mortgage payments
+# Client prices hundreds of thousands of mortgages per nightly run, so calling MortgagePayment once per loan (and looping over the 4 base frequencies each time) is too slow.
+# Client wants to use this library to compute all 6 payment options for a whole book of loans in one call, using NumPy arrays or a pandas DataFrame as input.
+# MortgagePortfolio extends MortgagePayment so the same math is reused:
+#   - quoted semi-annual rate -> EAR -> per-period rate (_periodic_rate)
+#   - present value of an annuity factor, including the zero-rate branch (_annuity_factor, overridden to work element-wise)
+#   - rapid bi-weekly / rapid weekly payments based on the monthly payment (payments, payment_details)
+# Attributes of the MortgagePortfolio class are the MortgagePayment attributes held as arrays (one element per loan).
+# Public functions:
+#   - batch_payment_details(loans, ...): dictionary of (payment, periodic rate, term payments) arrays for all six options.
+#   - batch_payments(loans, ...): DataFrame with one row per loan and one column per payment option (rounded like payments()).
+#   - build_schedule_tensor(loans, ...): all six amortization schedules for every loan in one preallocated ScheduleTensor
+#     (loans x payment option x period, padded with zeros to the longest term) instead of a dictionary of DataFrames per loan.
+#     rounding="half_even" or "half_up" switches to the integer-cents engine (int64 cents that reconcile exactly).
+# Loans can be passed as a DataFrame with the columns in LOAN_COLUMNS, or as four separate arrays.
+# Assumes values have been validated.
+
+import numpy as np
+import pandas as pd
+
+from Instrumentation import instrumented
+from LoanAmortization import PAYMENT_FREQUENCIES, MortgagePayment
+
+LOAN_COLUMNS = ("principal", "rate_percent", "amort_years", "term_years")
+PAYMENT_OPTIONS = ("Monthly", "Semi-Monthly", "Bi-Weekly", "Weekly", "Rapid Bi-Weekly", "Rapid Weekly")
+
+
+class MortgagePortfolio(MortgagePayment):
+    """A MortgagePayment whose rate, amortization and term are NumPy arrays (one element per loan).
+    All rate and payment formulas are inherited, so results match the single-loan class element by element."""
+
+    def __init__(self, rate_percent, amort_years, term_years):
+        self.rate = np.asarray(rate_percent, dtype=float) / 100.0
+        self.amort_years = np.asarray(amort_years).astype(int)
+        self.term_years = np.asarray(term_years).astype(int)
+
+        # EAR = (1 + r/2)^2 - 1
+        self.ear = (1 + self.rate / 2.0) ** 2 - 1
+
+    def _num_payments(self, years, freq_per_year):
+        """Compute the number of payments for each loan (truncated like int())."""
+        return (np.asarray(years) * freq_per_year).astype(int)
+
+    def _rates_and_factors(self):
+        """Periodic rate and annuity factor arrays per frequency, computed directly (array quotes are not cached)."""
+        return self._compute_rates_and_factors()
+
+    def _annuity_factor(self, r, n):
+        """Compute the present value of an annuity-immediate factor for each loan (a zero rate falls back to n)."""
+        r = np.asarray(r, dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(r == 0, n, (1 - (1 + r) ** (-n)) / r)
+
+    def _round_cents(self, amount):
+        """Round every loan's payment amount to the nearest cent, exactly as round(amount, 2) would.
+        np.round scales by 100 first, which can break half-cent ties (common for the rapid plans) the other way,
+        so values that land on a tie are rounded individually with round()."""
+        amount = np.asarray(amount, dtype=float)
+        rounded = np.round(amount, 2)
+        scaled = amount * 100
+        ties = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+        rounded[ties] = [round(x, 2) for x in amount[ties].tolist()]
+        return rounded
+
+
+def _loan_arrays(loans, rate_percent=None, amort_years=None, term_years=None):
+    """Return (principal, rate_percent, amort_years, term_years) as equal-length arrays from a DataFrame or four array-likes."""
+    if isinstance(loans, pd.DataFrame):
+        columns = [loans[col].to_numpy() for col in LOAN_COLUMNS]
+    else:
+        if term_years is None:
+            term_years = amort_years
+        columns = [loans, rate_percent, amort_years, term_years]
+    principal, rate_percent, amort_years, term_years = np.broadcast_arrays(*(np.atleast_1d(c) for c in columns))
+    return principal.astype(float), rate_percent, amort_years, term_years
+
+
+@instrumented()
+def batch_payment_details(loans, rate_percent=None, amort_years=None, term_years=None):
+    """Vectorized payment_details(): {option name: (payment, periodic rate, term payments)} with one array element per loan."""
+    principal, rate_percent, amort_years, term_years = _loan_arrays(loans, rate_percent, amort_years, term_years)
+    return MortgagePortfolio(rate_percent, amort_years, term_years).payment_details(principal)
+
+
+@instrumented()
+def batch_payments(loans, rate_percent=None, amort_years=None, term_years=None):
+    """Vectorized payments(): DataFrame of the 6 rounded payment amounts, one row per loan."""
+    principal, rate_percent, amort_years, term_years = _loan_arrays(loans, rate_percent, amort_years, term_years)
+    payments = MortgagePortfolio(rate_percent, amort_years, term_years).payments(principal)
+
+    index = loans.index if isinstance(loans, pd.DataFrame) else None
+    return pd.DataFrame(dict(zip(PAYMENT_OPTIONS, payments)), index=index)
+
+
+class ScheduleTensor:
+    """Amortization schedules for many loans and all six payment options held in preallocated arrays.
+    Each array has shape (loans, 6, periods); periods after payoff or after the term are zero, and n_periods holds
+    the number of real rows for every (loan, option) pair. Float arrays hold unrounded dollars (schedule() and to_long()
+    round to cents); integer arrays hold exact cents from the integer-cents mode (cents is True)."""
+
+    def __init__(self, start_balance, interest, payment, end_balance, n_periods, index=None):
+        self.cents = np.issubdtype(start_balance.dtype, np.integer)
+        self.start_balance = start_balance
+        self.interest = interest
+        self.payment = payment
+        self.end_balance = end_balance
+        self.n_periods = n_periods
+        self.index = pd.RangeIndex(len(n_periods)) if index is None else index
+        self.options = PAYMENT_OPTIONS
+
+    def _dollars(self, amounts):
+        """Amounts in dollars rounded to cents (exact cents / 100 in integer-cents mode)."""
+        return amounts / 100 if self.cents else np.round(amounts, 2)
+
+    def total_interest(self):
+        """Total interest paid within the term for each payment option across the whole portfolio."""
+        total = self.interest.sum(axis=(0, 2))
+        return pd.Series(total / 100 if self.cents else total, index=list(self.options), name="Interest Amount")
+
+    def schedule(self, loan, option):
+        """Return one loan's schedule as the same DataFrame that MortgagePayment.build_all_schedules builds."""
+        i = self.index.get_loc(loan)
+        j = self.options.index(option)
+        n = int(self.n_periods[i, j])
+        return pd.DataFrame({
+            "Period": np.arange(1, n + 1),
+            "Starting Balance": self._dollars(self.start_balance[i, j, :n]),
+            "Interest Amount": self._dollars(self.interest[i, j, :n]),
+            "Payment": self._dollars(self.payment[i, j, :n]),
+            "Ending Balance": self._dollars(self.end_balance[i, j, :n])
+        })
+
+    def to_long(self):
+        """Return every real row as one long-format table: Loan, Payment Option, Period and the four amounts."""
+        loan_idx, option_idx, period_idx = np.nonzero(np.arange(self.payment.shape[2]) < self.n_periods[..., None])
+        return pd.DataFrame({
+            "Loan": self.index.to_numpy()[loan_idx],
+            "Payment Option": pd.Categorical.from_codes(option_idx, self.options),
+            "Period": period_idx + 1,
+            "Starting Balance": self._dollars(self.start_balance[loan_idx, option_idx, period_idx]),
+            "Interest Amount": self._dollars(self.interest[loan_idx, option_idx, period_idx]),
+            "Payment": self._dollars(self.payment[loan_idx, option_idx, period_idx]),
+            "Ending Balance": self._dollars(self.end_balance[loan_idx, option_idx, period_idx])
+        })
+
+
+@instrumented()
+def build_schedule_tensor(loans, rate_percent=None, amort_years=None, term_years=None, dtype=np.float64, chunk_size=10_000,
+                          rounding=None):
+    """Vectorized build_all_schedules(): fill one ScheduleTensor for the whole portfolio.
+    Loans are processed chunk_size at a time so temporary arrays stay bounded; no per-loan DataFrames are created.
+    rounding="half_even" or "half_up" builds int64 cents schedules that reconcile to the cent (dtype is then ignored)."""
+    principal, rate_percent, amort_years, term_years = _loan_arrays(loans, rate_percent, amort_years, term_years)
+    portfolio = MortgagePortfolio(rate_percent, amort_years, term_years)
+    details = portfolio.payment_details(principal)
+
+    # (loans, 6) arrays of payment, periodic rate and number of payments in the term
+    pay, r, n_term = (np.stack([details[name][k] for name in PAYMENT_OPTIONS], axis=1) for k in range(3))
+    # (loans, 6) number of payments over the amortization, where the cents engine trues up the final payment
+    n_amort = np.stack([portfolio._num_payments(amort_years, PAYMENT_FREQUENCIES[name]) for name in PAYMENT_OPTIONS], axis=1)
+
+    n_loans, n_options = pay.shape
+    n_max = int(n_term.max(initial=0))
+    if rounding is not None:
+        dtype = np.int64
+    arrays = [np.zeros((n_loans, n_options, n_max), dtype=dtype) for _ in range(4)]
+    n_periods = np.zeros((n_loans, n_options), dtype=int)
+
+    for lo in range(0, n_loans, chunk_size):
+        hi = min(lo + chunk_size, n_loans)
+        if rounding is None:
+            *chunk, n_rows = portfolio._amortize(principal[lo:hi, None], pay[lo:hi], r[lo:hi], n_term[lo:hi])
+        else:
+            *chunk, n_rows = portfolio._amortize_cents(principal[lo:hi, None], pay[lo:hi], r[lo:hi], n_term[lo:hi],
+                                                       n_amort[lo:hi], rounding)
+        for out, values in zip(arrays, chunk):
+            out[lo:hi, :, :values.shape[-1]] = values
+        n_periods[lo:hi] = n_rows
+
+    index = loans.index if isinstance(loans, pd.DataFrame) else None
+    return ScheduleTensor(*arrays, n_periods, index=index)
@@ -0,0 +1,98 @@
+# Part A extension: Parallel portfolio runner
+# Client wants schedules and payment summaries for a whole loan file computed on every core of a batch node.
+# The loan file (CSV with the PortfolioAmortization.LOAN_COLUMNS columns) is split into fixed-size chunks that a process pool works through.
+# Each worker builds its chunk with build_schedule_tensor/batch_payments and writes the results to its own file
+# (chunk_00000.npz, chunk_00001.npz, ...), so only small summaries travel back to the parent process, never DataFrames.
+# Output ordering is deterministic: chunk numbers follow loan order regardless of which worker finishes first.
+# Public functions:
+#   - run_portfolio(loan_file, output_dir, workers, chunk_size): run the whole file and return the chunk manifest
+#   - load_chunk(path): read one chunk file back as (ScheduleTensor, payments DataFrame)
+# Run with: python PortfolioRunner.py loans.csv output_folder [workers] [chunk_size]
+# Assumes values have been validated.
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from PortfolioAmortization import LOAN_COLUMNS, PAYMENT_OPTIONS, ScheduleTensor, batch_payments, build_schedule_tensor
+
+MANIFEST_COLUMNS = ["Chunk", "First Loan", "Loans", "Path"] + [f"{name} Interest" for name in PAYMENT_OPTIONS]
+
+
+def _run_chunk(task):
+    """Worker: build schedules and payments for one chunk of loans, save them to the chunk file and return a summary row."""
+    chunk, first_loan, loans, path = task
+    tensor = build_schedule_tensor(loans)
+    payments = batch_payments(loans)
+
+    np.savez(
+        path,
+        loan=loans.index.to_numpy(),
+        start_balance=tensor.start_balance,
+        interest=tensor.interest,
+        payment=tensor.payment,
+        end_balance=tensor.end_balance,
+        n_periods=tensor.n_periods,
+        payments=payments.to_numpy(),
+    )
+
+    summary = {"Chunk": chunk, "First Loan": first_loan, "Loans": len(loans), "Path": path}
+    summary.update({f"{name} Interest": total for name, total in tensor.total_interest().items()})
+    return summary
+
+
+def run_portfolio(loan_file, output_dir, workers=None, chunk_size=5000):
+    """Split loan_file into chunks of chunk_size loans, process them in a pool of `workers` processes
+    (default: all cores) and write one .npz file per chunk plus payments.csv and manifest.csv to output_dir.
+    Returns the manifest DataFrame (one row per chunk, in loan order) with each chunk's total interest by payment option;
+    a loan file with no rows gives an empty manifest and payments.csv."""
+    loans = pd.read_csv(loan_file, usecols=list(LOAN_COLUMNS))
+    os.makedirs(output_dir, exist_ok=True)
+
+    tasks = [
+        (chunk, lo, loans.iloc[lo:lo + chunk_size], os.path.join(output_dir, f"chunk_{chunk:05d}.npz"))
+        for chunk, lo in enumerate(range(0, len(loans), chunk_size))
+    ]
+
+    # map() returns results in submission order, so the manifest follows loan order
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        manifest = pd.DataFrame(list(pool.map(_run_chunk, tasks)), columns=MANIFEST_COLUMNS)
+
+    # Payment summary for the whole file, assembled in chunk order from the chunk files (header only for a file with no loans)
+    parts = [_load_payments(path) for path in manifest["Path"]]
+    payments = pd.concat(parts) if parts else pd.DataFrame(columns=list(PAYMENT_OPTIONS))
+    payments.to_csv(os.path.join(output_dir, "payments.csv"), index_label="Loan")
+    manifest.to_csv(os.path.join(output_dir, "manifest.csv"), index=False)
+    return manifest
+
+
+def _load_payments(path):
+    """Read only the payments summary from a chunk file (the schedule arrays are not loaded)."""
+    with np.load(path) as data:
+        return pd.DataFrame(data["payments"], columns=list(PAYMENT_OPTIONS), index=pd.Index(data["loan"]))
+
+
+def load_chunk(path):
+    """Read a chunk file written by run_portfolio back as (ScheduleTensor, payments DataFrame)."""
+    with np.load(path) as data:
+        index = pd.Index(data["loan"])
+        tensor = ScheduleTensor(
+            data["start_balance"], data["interest"], data["payment"], data["end_balance"], data["n_periods"], index=index,
+        )
+    return tensor, _load_payments(path)
+
+
+if __name__ == "__main__":
+    loan_file, output_dir = sys.argv[1], sys.argv[2]
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    chunk_size = int(sys.argv[4]) if len(sys.argv) > 4 else 5000
+
+    manifest = run_portfolio(loan_file, output_dir, workers, chunk_size)
+    print(f"Processed {manifest['Loans'].sum():,} loans in {len(manifest)} chunks; results saved to: {output_dir}")
+    print("\nTotal interest within the term by payment option")
+    print("-------------------------------------------------")
+    for name in PAYMENT_OPTIONS:
+        print(f"{name:>18}: ${manifest[f'{name} Interest'].sum():,.2f}")
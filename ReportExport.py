@@ -0,0 +1,174 @@
+# Report export for the mortgage and CPI libraries.
+# Client wants schedules and analysis tables written quickly, including bulk runs over whole portfolios.
+# Column widths and number formats are worked out from the DataFrames before anything is written, so no worksheet is scanned cell by cell afterwards.
+# Backends (pluggable through register_exporter):
+#   - "excel":   one .xlsx workbook, one worksheet per table, streamed row by row with XlsxWriter (constant-memory mode)
+#                when it is installed, or with a write-only openpyxl workbook otherwise
+#   - "csv":     one .csv file per table in a folder
+#   - "parquet": one .parquet file per table in a folder (needs pyarrow or fastparquet)
+#   - "sqlite":  one SQLite database file, one table per DataFrame (replaced if it already exists)
+# Public functions:
+#   - export_tables(tables, path, backend, number_formats): write a dictionary of {table name: DataFrame}
+#   - column_widths(df): auto-fit widths (longest value or header + 2) computed from the DataFrame
+#   - register_exporter(name, func): add a new backend
+# Assumes values have been validated.
+
+import os
+import sqlite3
+
+from Instrumentation import stage
+
+CURRENCY_FORMAT = u'"$"#,##0.00'
+DATE_FORMAT = "yyyy-mm-dd h:mm:ss"   # openpyxl's format for datetime cells, so both Excel backends write the same dates
+HEADER_FILL_COLOR = "D9D9D9"
+
+
+def column_widths(df):
+    """Return the auto-fit width of every column: length of the longest value (as text) or header, plus 2."""
+    widths = []
+    for col in df.columns:
+        values = df[col].dropna()
+        longest = int(values.astype(str).str.len().max()) if len(values) else 0
+        widths.append(max(longest, len(str(col))) + 2)
+    return widths
+
+
+def _excel_rows(df):
+    """Return an iterator over the rows of df as tuples, with missing values as None so they are written as blank cells."""
+    data = df.astype(object).where(df.notna(), None) if df.isna().any().any() else df
+    return data.itertuples(index=False, name=None)
+
+
+def _export_xlsxwriter(tables, path, number_formats):
+    """Excel backend using XlsxWriter in constant-memory mode; number formats are set once per column."""
+    import xlsxwriter
+
+    wb = xlsxwriter.Workbook(path, {"constant_memory": True, "default_date_format": DATE_FORMAT})
+    header_format = wb.add_format({
+        "bold": True, "align": "center", "valign": "vcenter", "text_wrap": True,
+        "bg_color": "#" + HEADER_FILL_COLOR, "pattern": 1,
+    })
+    cell_formats = {}
+
+    for name, df in tables.items():
+        ws = wb.add_worksheet(name)
+        formats = number_formats.get(name, {})
+        for col_idx, (col_name, width) in enumerate(zip(df.columns, column_widths(df))):
+            fmt = formats.get(col_name)
+            if fmt is not None and fmt not in cell_formats:
+                cell_formats[fmt] = wb.add_format({"num_format": fmt})
+            ws.set_column(col_idx, col_idx, width, cell_formats.get(fmt))
+
+        ws.write_row(0, 0, [str(col) for col in df.columns], header_format)
+        for row_idx, row in enumerate(_excel_rows(df), start=1):
+            ws.write_row(row_idx, 0, row)
+
+    wb.close()
+
+
+def _export_openpyxl(tables, path, number_formats):
+    """Excel backend using a write-only (streaming) openpyxl workbook; formatted cells are written as WriteOnlyCells."""
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, Alignment, PatternFill
+    from openpyxl.utils import get_column_letter
+
+    header_font = Font(bold=True)
+    header_alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+    header_fill = PatternFill(start_color=HEADER_FILL_COLOR, end_color=HEADER_FILL_COLOR, fill_type="solid")
+
+    wb = Workbook(write_only=True)
+    for name, df in tables.items():
+        ws = wb.create_sheet(title=name)
+
+        # Widths must be set before any rows are streamed
+        for col_idx, width in enumerate(column_widths(df), start=1):
+            ws.column_dimensions[get_column_letter(col_idx)].width = width
+
+        header = []
+        for col_name in df.columns:
+            cell = WriteOnlyCell(ws, value=str(col_name))
+            cell.font = header_font
+            cell.alignment = header_alignment
+            cell.fill = header_fill
+            header.append(cell)
+        ws.append(header)
+
+        formats = [number_formats.get(name, {}).get(col) for col in df.columns]
+        for values in _excel_rows(df):
+            row = []
+            for value, fmt in zip(values, formats):
+                if fmt is None or value is None:
+                    row.append(value)
+                else:
+                    cell = WriteOnlyCell(ws, value=value)
+                    cell.number_format = fmt
+                    row.append(cell)
+            ws.append(row)
+
+    wb.save(path)
+
+
+def export_excel(tables, path, number_formats=None):
+    """Write each table to its own worksheet with a styled header row, fitted widths and number formats.
+    number_formats maps table name -> {column name: Excel number format}.
+    Uses XlsxWriter when it is installed (fastest) and a write-only openpyxl workbook otherwise."""
+    number_formats = number_formats or {}
+    try:
+        import xlsxwriter  # noqa: F401
+    except ImportError:
+        _export_openpyxl(tables, path, number_formats)
+    else:
+        _export_xlsxwriter(tables, path, number_formats)
+    return path
+
+
+def _export_files(tables, folder, extension, write):
+    """Write one file per table into folder and return the list of paths."""
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for name, df in tables.items():
+        file_path = os.path.join(folder, f"{name}.{extension}")
+        write(df, file_path)
+        paths.append(file_path)
+    return paths
+
+
+def export_csv(tables, path, number_formats=None):
+    """Write each table to <path>/<table name>.csv (number formats are not applicable)."""
+    return _export_files(tables, path, "csv", lambda df, file_path: df.to_csv(file_path, index=False))
+
+
+def export_parquet(tables, path, number_formats=None):
+    """Write each table to <path>/<table name>.parquet (number formats are not applicable)."""
+    return _export_files(tables, path, "parquet", lambda df, file_path: df.to_parquet(file_path, index=False))
+
+
+def export_sqlite(tables, path, number_formats=None):
+    """Write each table to its own table in the SQLite database at path (number formats are not applicable)."""
+    with sqlite3.connect(path) as conn:
+        for name, df in tables.items():
+            df.to_sql(name, conn, if_exists="replace", index=False)
+    conn.close()
+    return path
+
+
+EXPORTERS = {
+    "excel": export_excel,
+    "csv": export_csv,
+    "parquet": export_parquet,
+    "sqlite": export_sqlite,
+}
+
+
+def register_exporter(name, func):
+    """Add a backend: func(tables, path, number_formats=None) writes {table name: DataFrame} to path."""
+    EXPORTERS[name] = func
+
+
+def export_tables(tables, path, backend="excel", number_formats=None):
+    """Write {table name: DataFrame} to path with the chosen backend ("excel", "csv", "parquet", "sqlite" or a registered one)."""
+    if backend not in EXPORTERS:
+        raise ValueError(f"Unknown export backend {backend!r}; choose from {sorted(EXPORTERS)}")
+    with stage(f"export_tables {backend}", rows=sum(len(df) for df in tables.values())):
+        return EXPORTERS[backend](tables, path, number_formats=number_formats)
@@ -0,0 +1,219 @@
+# Part A extension: Prepayment and rate-scenario simulation
+# Client runs Monte Carlo risk scenarios on single mortgages: rate resets at each renewal, lump-sum prepayments and payment
+# increases, over thousands of paths per loan.
+# The balance recurrence (interest, payment capped at what is owed, prepayment) is stepped period by period and vectorized
+# across paths. Rates and payments follow MortgagePayment.payment_details():
+#   - quoted annual rates (compounded semi-annually) -> EAR -> per-period rate (MortgagePortfolio, one element per path)
+#   - at the start and at every renewal (every term) the payment is recalculated on the remaining balance over the remaining
+#     amortization at the rate in effect; rapid plans pay the monthly payment / 2 (bi-weekly) or / 4 (weekly)
+# Paths are processed batch_size at a time and folded into streaming summaries (ScenarioSummary): an exact histogram of payoff
+# periods and a log-bucket sketch of total interest (quantiles within 0.5%), so per-path balances are never kept.
+# Scenario inputs (rate_paths, prepayments, payment_increases) are arrays broadcastable to (paths, periods), or generators
+# called as f(rng, n_paths, n_periods) for each batch, such as renewal_rate_paths() and annual_lump_sums().
+# payment_increases are payment levels (% above the payment set at the last renewal), not per-period increments, so a
+# constant or per-path value raises the payment by that % without compounding.
+# Public functions:
+#   - simulate_scenarios(principal, rate_percent, amort_years, term_years, option, n_paths, ...): run paths, return a ScenarioSummary
+#   - renewal_rate_paths(rate_percent, term_years, option, volatility): random-walk quoted rates that reset at each renewal
+#   - annual_lump_sums(probability, amount, option): once-a-year lump-sum prepayments taken with a given probability
+# Assumes values have been validated.
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from Instrumentation import instrumented
+from LoanAmortization import PAYMENT_FREQUENCIES
+from PortfolioAmortization import MortgagePortfolio
+
+DEFAULT_QUANTILES = (0.01, 0.05, 0.25, 0.5, 0.75, 0.95, 0.99)
+
+
+class _LogSketch:
+    """Streaming quantile sketch for non-negative values: counts per logarithmic bucket of relative width 2 * accuracy,
+    so any quantile is returned within `accuracy` (relative) using memory that grows with the value range, not the count."""
+
+    def __init__(self, accuracy=0.005):
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.zeros = 0
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+
+    def add(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        positive = values[values > 0]
+        self.zeros += values.size - positive.size
+        if not positive.size:
+            return
+        keys = np.ceil(np.log(positive) / self.log_gamma).astype(np.int64)
+        lo, hi = int(keys.min()), int(keys.max())
+        if not self.counts.size:
+            self.offset = lo
+        new_lo, new_hi = min(lo, self.offset), max(hi, self.offset + self.counts.size - 1)
+        if new_lo < self.offset or new_hi >= self.offset + self.counts.size:
+            grown = np.zeros(new_hi - new_lo + 1, dtype=np.int64)
+            grown[self.offset - new_lo:self.offset - new_lo + self.counts.size] = self.counts
+            self.counts, self.offset = grown, new_lo
+        self.counts += np.bincount(keys - self.offset, minlength=self.counts.size)
+
+    def quantiles(self, qs):
+        """Value at each quantile in qs (bucket mid-points; 0 for quantiles that fall among zero values)."""
+        cumulative = np.cumsum(np.concatenate([[self.zeros], self.counts]))
+        total = cumulative[-1]
+        ranks = np.clip(np.ceil(np.asarray(qs) * total).astype(np.int64), 1, total)
+        bucket = np.searchsorted(cumulative, ranks)
+        keys = self.offset + bucket - 1
+        return np.where(bucket == 0, 0.0, 2 * self.gamma ** keys / (self.gamma + 1))
+
+
+class ScenarioSummary:
+    """Distribution of scenario outcomes folded in batch by batch: payoff period histogram (exact), total interest sketch,
+    and running totals for means. Paths not paid off within the horizon have no payoff period (counted in not_paid_off)."""
+
+    def __init__(self, horizon, accuracy=0.005):
+        self.horizon = horizon
+        self.n_paths = 0
+        self.payoff_counts = np.zeros(horizon + 1, dtype=np.int64)
+        self.not_paid_off = 0
+        self.interest = _LogSketch(accuracy)
+        self.interest_sum = 0.0
+        self.prepaid_sum = 0.0
+
+    def add(self, payoff_period, total_interest, total_prepaid):
+        """Fold one batch of paths in: payoff period (0 = not paid off), total interest and total prepayments per path."""
+        self.n_paths += len(payoff_period)
+        self.payoff_counts += np.bincount(payoff_period, minlength=self.horizon + 1)
+        self.not_paid_off = int(self.payoff_counts[0])
+        self.interest.add(total_interest)
+        self.interest_sum += float(np.sum(total_interest))
+        self.prepaid_sum += float(np.sum(total_prepaid))
+
+    def payoff_quantiles(self, qs=DEFAULT_QUANTILES):
+        """Payoff period at each quantile among all paths (inf where the quantile falls among paths not paid off)."""
+        cumulative = np.cumsum(self.payoff_counts[1:])
+        ranks = np.ceil(np.asarray(qs) * self.n_paths)
+        period = np.searchsorted(cumulative, ranks) + 1.0
+        return np.where(period > self.horizon, np.inf, period)
+
+    def quantiles(self, qs=DEFAULT_QUANTILES):
+        """DataFrame indexed by quantile with Payoff Period and Total Interest."""
+        return pd.DataFrame({
+            "Payoff Period": self.payoff_quantiles(qs),
+            "Total Interest": self.interest.quantiles(qs),
+        }, index=pd.Index(qs, name="Quantile"))
+
+    def summary(self):
+        """One-row overview: paths, share paid off within the horizon, mean payoff period (paid-off paths), mean total
+        interest and mean total prepayments."""
+        paid = self.n_paths - self.not_paid_off
+        periods = np.arange(1, self.horizon + 1)
+        return pd.Series({
+            "Paths": self.n_paths,
+            "Paid Off (%)": 100 * paid / self.n_paths,
+            "Mean Payoff Period": (self.payoff_counts[1:] @ periods) / paid if paid else math.nan,
+            "Mean Total Interest": self.interest_sum / self.n_paths,
+            "Mean Total Prepaid": self.prepaid_sum / self.n_paths,
+        })
+
+
+def _batch(source, rng, lo, hi, n_paths, horizon, default):
+    """Rows lo:hi of a scenario input as a (paths, periods) array: call a generator, slice a per-path array, or broadcast."""
+    if source is None:
+        return np.full((hi - lo, horizon), default, dtype=float)
+    if callable(source):
+        return np.broadcast_to(np.asarray(source(rng, hi - lo, horizon), dtype=float), (hi - lo, horizon))
+    source = np.asarray(source, dtype=float)
+    if source.ndim == 2 and source.shape[0] == n_paths and n_paths > 1:
+        source = source[lo:hi]
+    return np.broadcast_to(source[..., :horizon] if source.ndim else source, (hi - lo, horizon))
+
+
+def _payment(rate_percent, years_left, principal, option):
+    """Payment per path for `option` on the balance owing over the years of amortization left (payment_details conventions)."""
+    return MortgagePortfolio(rate_percent, years_left, years_left).payment_details(principal)[option][0]
+
+
+@instrumented(rows=lambda summary: summary.n_paths)
+def simulate_scenarios(principal, rate_percent, amort_years, term_years, option="Monthly", n_paths=10_000,
+                       rate_paths=None, prepayments=None, payment_increases=None, horizon=None,
+                       batch_size=1000, seed=0, accuracy=0.005):
+    """Run n_paths scenarios for one mortgage and return a ScenarioSummary.
+    rate_paths: quoted annual rate (%) per path and period (default: rate_percent throughout); the payment is reset at the
+    start of every term from the rate in effect. prepayments: lump sums ($) paid after the regular payment, capped at the
+    balance. payment_increases: payment level per path and period, as a % above the payment set at the last renewal
+    (not compounded: 5.0 in every period pays 5% more throughout; a step-up held until renewal is 0 before the step and
+    5.0 from it on). horizon defaults to the amortization (periods); batch_size paths are held in memory at a time."""
+    f = PAYMENT_FREQUENCIES[option]
+    horizon = horizon or int(amort_years * f)
+    term_periods = max(int(term_years * f), 1)
+    rng = np.random.default_rng(seed)
+    summary = ScenarioSummary(horizon, accuracy)
+
+    for lo in range(0, n_paths, batch_size):
+        hi = min(lo + batch_size, n_paths)
+        rates = _batch(rate_paths, rng, lo, hi, n_paths, horizon, rate_percent)
+        prepay = _batch(prepayments, rng, lo, hi, n_paths, horizon, 0.0)
+        increase = _batch(payment_increases, rng, lo, hi, n_paths, horizon, 0.0)
+
+        # Per-period rates for the whole batch through the EAR conversion (one MortgagePortfolio element per path/period)
+        r = MortgagePortfolio(rates, amort_years, term_years)._periodic_rate(f)
+
+        balance = np.full(hi - lo, float(principal))
+        total_interest = np.zeros(hi - lo)
+        total_prepaid = np.zeros(hi - lo)
+        payoff = np.zeros(hi - lo, dtype=np.int64)
+        renewal_payment = None
+
+        for t in range(horizon):
+            if t % term_periods == 0:
+                # Whole years left (renewals fall on term boundaries); at least one year past the amortization
+                years_left = max(amort_years - t // f, 1)
+                renewal_payment = _payment(rates[:, t], years_left, balance, option)
+            payment = renewal_payment * (1 + increase[:, t] / 100)
+
+            open_ = payoff == 0
+            interest = balance * r[:, t]
+            paid = np.minimum(payment, balance + interest)
+            balance = balance + interest - paid
+            extra = np.minimum(prepay[:, t], balance)
+            balance = balance - extra
+
+            total_interest += np.where(open_, interest, 0.0)
+            total_prepaid += np.where(open_, extra, 0.0)
+            # Same half-cent cut-off as the schedules: a balance under half a cent is paid off
+            done = open_ & (balance < 0.005)
+            payoff[done] = t + 1
+            balance[done] = 0.0
+            if not open_.any():
+                break
+
+        summary.add(payoff, total_interest, total_prepaid)
+    return summary
+
+
+def renewal_rate_paths(rate_percent, term_years, option="Monthly", volatility=1.0, floor=0.5):
+    """Generator for rate_paths: the quoted rate stays fixed within each term and moves by a normal step with standard
+    deviation `volatility` (percentage points) at every renewal, never below `floor`."""
+    term_periods = max(int(term_years * PAYMENT_FREQUENCIES[option]), 1)
+
+    def generate(rng, n_paths, n_periods):
+        n_terms = -(-n_periods // term_periods)
+        steps = rng.normal(0.0, volatility, size=(n_paths, n_terms))
+        steps[:, 0] = 0.0
+        by_term = np.maximum(rate_percent + np.cumsum(steps, axis=1), floor)
+        return np.repeat(by_term, term_periods, axis=1)[:, :n_periods]
+    return generate
+
+
+def annual_lump_sums(probability, amount, option="Monthly"):
+    """Generator for prepayments: at the end of each year a lump sum of `amount` dollars is paid with the given probability."""
+    f = PAYMENT_FREQUENCIES[option]
+
+    def generate(rng, n_paths, n_periods):
+        prepay = np.zeros((n_paths, n_periods))
+        anniversaries = np.arange(f - 1, n_periods, f)
+        prepay[:, anniversaries] = amount * (rng.random((n_paths, len(anniversaries))) < probability)
+        return prepay
+    return generate